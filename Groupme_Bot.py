@@ -2,10 +2,35 @@ import sys
 sys.stdout.reconfigure(encoding='utf-8') #This ensures that it can run on the raspberry pi
 
 import requests
+from requests.adapters import HTTPAdapter
 import uuid
 import time
 import json
 import os
+import random
+import re
+import threading
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import functools
+import itertools
+import atexit
+import mmap
+import heapq
+import bisect
+import cProfile
+import pstats
+from collections import namedtuple
+import sqlite3
+from collections import deque
+
+try:
+    import aiohttp  # optional: used by the asyncio runtime for non-blocking HTTP
+except ImportError:
+    aiohttp = None
 
 # ---------------------------------------------------------
 # Configuration
@@ -13,6 +38,10 @@ import os
 TOKEN = "TOKEN"
 GROUP_ID = "GROUP_ID"   # Topic group, this is where the bot is interacted with at
 MAIN_GROUP_ID = "MAIN_TOPIC"   # This NEEDS to be the main chat, so the script can get the admins for admin commands
+
+# Every group/topic the bot watches from this one process. Each gets its own
+# message cursor, triggers and leaderboards; the first one keeps the original file names.
+GROUP_IDS = [GROUP_ID]
 YOUR_USER_ID = "USER_ID"
 
 # TEMPORARY admin override (user IDs as strings)
@@ -26,11 +55,57 @@ WELCOME_MESSAGE = "Welcome to the group, {name}!" # <----This is not used yet
 # Cooldown to prevent spam when multiple people join
 last_welcome_time = 0
 
+# Polling: how often to check for new messages, and how many to fetch per page (GroupMe max is 100).
+# The wait adapts to activity: POLL_INTERVAL_MIN while a game is being played or the
+# chat is busy, then growing from POLL_INTERVAL up to POLL_INTERVAL_MAX while it is quiet.
+POLL_INTERVAL = 2
+POLL_INTERVAL_MIN = 0.5
+POLL_INTERVAL_MAX = 30
+POLL_BACKOFF = 1.5          # every empty poll while idle multiplies the wait by this
+POLL_ACTIVE_WINDOW = 60     # seconds after the last message that still count as busy
+POLL_LIMIT = 100
+
+# The last handled message of every group is saved here after each batch, so
+# after a restart the bot catches up on what was sent while it was down
+CURSOR_FILE = "poll_cursors.json"
+
+# Backfill: on a restart, missed messages older than BACKFILL_REPLY_WINDOW seconds
+# are caught up without answering each one (see BACKFILL below)
+BACKFILL_ENABLED = True
+BACKFILL_REPLY_WINDOW = 120
+BACKFILL_MAX_MESSAGES = 5000   # anything missed before the newest this many is skipped
+
+# Webhook mode: a GroupMe bot callback to a local HTTP server makes the bot poll
+# straight away instead of waiting for the next poll. Polling otherwise only runs
+# every WEBHOOK_POLL_INTERVAL seconds to pick up anything the callbacks missed.
+WEBHOOK_ENABLED = False
+WEBHOOK_HOST = "127.0.0.1"   # only this machine; use "0.0.0.0" (or a reverse proxy) so GroupMe can reach it
+WEBHOOK_PORT = 8080
+WEBHOOK_PATH = "/groupme"   # add something hard to guess here, GroupMe callbacks carry no secret
+WEBHOOK_POLL_INTERVAL = 30
+
+# Metrics: counters and latency histograms, shown to admins with !stats. With
+# METRICS_ENABLED they are also served in Prometheus text format at
+# http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = False
+METRICS_HOST = "127.0.0.1"   # local only by default
+METRICS_PORT = 9108
+
+# Run the asyncio runtime (watch_for_mentions_async) instead of the plain polling loop
+USE_ASYNCIO = False
+
+# Where leaderboards and triggers are kept: "json" (the JSON files, default) or "sqlite"
+STORAGE_BACKEND = "json"
+SQLITE_FILE = "clean_memes.db"
+
 TRIGGER_FILE = "triggers.json"
-MAX_TRIGGERS = 15
+MAX_TRIGGERS = 500
 
 GLOBAL_ADMINS = set()
 
+# How long (seconds) a fetched member list is trusted before it is refreshed in the background
+MEMBERSHIP_TTL = 600
+
 # ---------------------------------------------------------
 # Bot Signature
 # ---------------------------------------------------------
@@ -44,136 +119,1373 @@ BOT_SIGNATURE = (
 BASE_URL = "https://api.groupme.com/v3"
 
 # ---------------------------------------------------------
-# GroupMe API helper
+# METRICS
 # ---------------------------------------------------------
-def groupme_api(path, method="GET", data=None):
-    url = f"{BASE_URL}/{path}?token={TOKEN}"
+# Histograms keep a count per bucket (seconds, or messages for
+# bot_messages_per_poll) plus a running sum, like Prometheus does. Values the
+# bot already tracks elsewhere (outbound queue, webhook and poll stats) are
+# read when the metrics are rendered instead of being counted twice.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "bot_poll_duration_seconds": ("histogram", "Time to poll every group once", LATENCY_BUCKETS),
+    "bot_messages_per_poll": ("histogram", "New messages returned by one poll", COUNT_BUCKETS),
+    "bot_handler_duration_seconds": ("histogram", "Time to handle one message, by handler", LATENCY_BUCKETS),
+    "bot_api_request_duration_seconds": ("histogram", "GroupMe API round trip, by endpoint", LATENCY_BUCKETS),
+    "bot_api_requests_total": ("counter", "GroupMe API requests, by endpoint and status", None),
+    "bot_file_io_duration_seconds": ("histogram", "JSON file reads and writes", LATENCY_BUCKETS),
+    "bot_ai_search_duration_seconds": ("histogram", "Time for the AI to choose a move, by game", LATENCY_BUCKETS),
+}
+
+_metrics_started = time.time()
+_metrics_lock = threading.Lock()
+_metric_values = {}   # (name, labels) -> count, or [bucket counts, sum, count] for histograms
+_metrics_server = None
+
+def metric_labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def inc_counter(name, amount=1, **labels):
+    key = (name, metric_labels(labels))
+    with _metrics_lock:
+        _metric_values[key] = _metric_values.get(key, 0) + amount
+
+def observe(name, value, **labels):
+    buckets = METRICS[name][2]
+    key = (name, metric_labels(labels))
+
+    with _metrics_lock:
+        histogram = _metric_values.get(key)
+        if histogram is None:
+            histogram = _metric_values[key] = [[0] * len(buckets), 0.0, 0]
+
+        # Values past the last bucket only show up in +Inf (the total count)
+        index = bisect.bisect_left(buckets, value)
+        if index < len(buckets):
+            histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+def get_histograms(name):
+    """
+    Returns {labels: (count, sum, p95)} for one histogram. p95 is the upper
+    bound of the bucket it falls in, or None if it is past the last bucket.
+    """
+    buckets = METRICS[name][2]
+    result = {}
+
+    with _metrics_lock:
+        for (metric, labels), value in _metric_values.items():
+            if metric != name or not value[2]:
+                continue
+            counts, total, count = value
+
+            p95 = None
+            running = 0
+            for bound, n in zip(buckets, counts):
+                running += n
+                if running >= 0.95 * count:
+                    p95 = bound
+                    break
+
+            result[labels] = (count, total, p95)
+
+    return result
+
+def metric_gauges():
+    # (name, type, help, [(labels, value)]) for values kept elsewhere in the bot
+    outbound = get_outbound_stats()
+    poll = get_poll_stats()
+    games = {}
+    for session in list(game_sessions.values()):
+        games[session.game] = games.get(session.game, 0) + 1
+
+    return [
+        ("bot_uptime_seconds", "gauge", "Seconds since the bot started", [((), time.time() - _metrics_started)]),
+        ("bot_outbound_queue_depth", "gauge", "Posts waiting for the rate limiter", [((), outbound["depth"])]),
+        ("bot_outbound_messages_total", "counter", "Outbound messages, by outcome",
+            [((("outcome", k),), outbound[k]) for k in ("queued", "merged", "sent", "dropped")]),
+        ("bot_webhook_messages_total", "counter", "Webhook callbacks, by outcome",
+            [((("outcome", k),), webhook_stats[k]) for k in ("received", "rejected")]),
+        ("bot_polls_total", "counter", "Polls, and how many found nothing new",
+            [((("result", "messages"),), poll["polls"] - poll["empty_polls"]), ((("result", "empty"),), poll["empty_polls"])]),
+        ("bot_poll_interval_seconds", "gauge", "Current wait between polls", [((), poll["current_interval"])]),
+        ("bot_game_sessions", "gauge", "Running games, by game",
+            [((("game", game),), games.get(game, 0)) for game in GAME_NAMES]),
+    ]
+
+def format_metric_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+def render_metrics():
+    # Prometheus text exposition format
+    with _metrics_lock:
+        values = {
+            key: (list(value[0]), value[1], value[2]) if isinstance(value, list) else value
+            for key, value in _metric_values.items()
+        }
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        for (metric, labels), value in sorted(values.items()):
+            if metric != name:
+                continue
+
+            if kind == "counter":
+                lines.append(f"{name}{format_metric_labels(labels)} {value}")
+                continue
+
+            counts, total, count = value
+            running = 0
+            for bound, n in zip(buckets, counts):
+                running += n
+                lines.append(f"{name}_bucket{format_metric_labels(labels, [('le', bound)])} {running}")
+            lines.append(f"{name}_bucket{format_metric_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{format_metric_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_metric_labels(labels)} {count}")
+
+    for name, kind, help_text, samples in metric_gauges():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{format_metric_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server():
+    global _metrics_server
+
+    if not METRICS_ENABLED or _metrics_server is not None:
+        return _metrics_server
 
     try:
-        if method == "GET":
-            return requests.get(url, timeout=10).json()
-        elif method == "POST":
-            return requests.post(url, json=data, timeout=10).json()
-    except Exception as e:
-        print(f"[ERROR] API request failed: {e}")
-        time.sleep(2)
+        _metrics_server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), MetricsHandler)
+    except OSError as e:
+        print(f"[ERROR] Could not start metrics server on port {METRICS_PORT}: {e}")
         return None
 
+    _metrics_server.daemon_threads = True
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    print(f"Metrics at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    return _metrics_server
+
+def format_duration(seconds):
+    if seconds is None:
+        return f">{LATENCY_BUCKETS[-1]}s"
+    if seconds < 0.001:
+        return f"{seconds * 1000000:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    return f"{seconds:.1f}s"
+
+def histogram_line(count, total, p95):
+    return f"{count} × avg {format_duration(total / count)}, p95 ≤{format_duration(p95)}"
+
+def get_stats_text():
+    uptime = int(time.time() - _metrics_started)
+    poll = get_poll_stats()
+    outbound = get_outbound_stats()
+
+    lines = [f"📊 Bot stats (up {uptime // 3600}h {uptime % 3600 // 60}m)", ""]
+
+    polls = get_histograms("bot_poll_duration_seconds").get(())
+    lines.append(
+        f"Polls: {poll['polls']} ({poll['empty_polls']} empty), {poll['messages']} messages, "
+        f"every {poll['current_interval']:g}s"
+    )
+    if polls:
+        lines.append(f"   {histogram_line(*polls)}")
+
+    with _api_stats_lock:
+        api = {endpoint: dict(stats) for endpoint, stats in api_stats.items()}
+    api_histograms = get_histograms("bot_api_request_duration_seconds")
+    if api:
+        lines.append("API:")
+    for endpoint, stats in sorted(api.items()):
+        histogram = api_histograms.get(metric_labels({"endpoint": endpoint}))
+        timing = histogram_line(*histogram) if histogram else f"{stats['count']} calls"
+        lines.append(f"   {endpoint}: {timing}, {stats['errors']} errors, last {stats['last_status']}")
+
+    lines.append(
+        f"Outbound: {outbound['sent']} sent, {outbound['merged']} merged, "
+        f"{outbound['dropped']} dropped, {outbound['depth']} waiting"
+    )
+
+    if poll["webhook"] or webhook_stats["received"]:
+        lines.append(
+            f"Webhook: {webhook_stats['received']} received, {webhook_stats['rejected']} rejected"
+        )
+
+    # Slowest handlers first, by total time
+    handlers = sorted(get_histograms("bot_handler_duration_seconds").items(), key=lambda item: -item[1][1])
+    if handlers:
+        lines.append("Handlers:")
+    for labels, histogram in handlers[:5]:
+        lines.append(f"   {dict(labels)['handler']}: {histogram_line(*histogram)}")
+
+    for labels, histogram in sorted(get_histograms("bot_ai_search_duration_seconds").items()):
+        lines.append(f"AI {GAME_NAMES.get(dict(labels)['game'], dict(labels)['game'])}: {histogram_line(*histogram)}")
+
+    for labels, histogram in sorted(get_histograms("bot_file_io_duration_seconds").items()):
+        lines.append(f"File {dict(labels)['op']}s: {histogram_line(*histogram)}")
+
+    return "\n".join(lines)
+
 # ---------------------------------------------------------
-# Unified message sender
+# PROFILER (admin !profile command)
 # ---------------------------------------------------------
-def send_message(text, use_signature=True):
-    full_text = f"{text}{BOT_SIGNATURE}" if use_signature else text
+# "!profile 30" profiles the bot loop for 30 seconds, "!profile 50 msgs" for
+# the next 50 messages. cProfile is only switched on while a tick is being
+# handled (not while the loop waits for the next poll) and only for a bounded
+# window, so the bot keeps running normally. The stats are saved to PROFILE_DIR
+# (open them with "python -m pstats <file>" or snakeviz) and the ten functions
+# with the most self time are posted to the chat.
+PROFILE_DIR = "profiles"
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 300
+PROFILE_MAX_MESSAGES = 500
+PROFILE_TOP = 10
+
+_profile = None   # the running profile, see start_profile
+
+def start_profile(group_id, seconds=None, messages=None):
+    global _profile
+
+    if _profile is not None:
+        return False
+
+    # A message count still stops after PROFILE_MAX_SECONDS if the chat goes quiet
+    _profile = {
+        "profiler": cProfile.Profile(),
+        "group_id": group_id,
+        "started": time.time(),
+        "until": time.time() + (seconds or PROFILE_MAX_SECONDS),
+        "messages_wanted": messages,
+        "messages": 0,
+        "ticks": 0,
+        "enabled": False
+    }
+    return True
+
+def profile_tick_begin():
+    if _profile is not None and not _profile["enabled"]:
+        _profile["profiler"].enable()
+        _profile["enabled"] = True
+        _profile["ticks"] += 1
+
+def profile_tick_end():
+    if _profile is None or not _profile["enabled"]:
+        return
+
+    _profile["profiler"].disable()
+    _profile["enabled"] = False
+
+    wanted = _profile["messages_wanted"]
+    if time.time() >= _profile["until"] or (wanted and _profile["messages"] >= wanted):
+        finish_profile()
+
+def profile_count_message():
+    if _profile is not None:
+        _profile["messages"] += 1
+
+def stop_profile():
+    # Ends the running profile now (the summary goes out with the next tick)
+    if _profile is None:
+        return False
+    if _profile["enabled"]:
+        _profile["profiler"].disable()
+        _profile["enabled"] = False
+    finish_profile()
+    return True
+
+def finish_profile():
+    global _profile
+
+    profile, _profile = _profile, None
+    elapsed = time.time() - profile["started"]
+
+    stats = pstats.Stats(profile["profiler"])
+    path = os.path.join(PROFILE_DIR, time.strftime("profile_%Y%m%d_%H%M%S.pstats"))
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stats.dump_stats(path)
+    except OSError as e:
+        print(f"[ERROR] Could not save profile: {e}")
+        path = None
+
+    queue_message(profile["group_id"], get_profile_text(stats, path, elapsed, profile), use_signature=False)
+
+def profile_function_name(key):
+    filename, line, name = key
+    if filename == "~":
+        return name   # built-ins, e.g. <method 'acquire' of '_thread.lock' objects>
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+def get_profile_text(stats, path, elapsed, profile):
+    # stats.stats: (file, line, function) -> (primitive calls, calls, self time, cumulative time, callers)
+    entries = sorted(stats.stats.items(), key=lambda item: -item[1][2])
+    busy = sum(entry[2] for key, entry in entries)
+    messages = profile["messages"]
+
+    lines = [
+        f"🔍 Profile done: {elapsed:.0f}s, {messages} messages, {profile['ticks']} ticks, "
+        f"{busy:.2f}s busy" + (f" ({busy / messages * 1000:.1f}ms per message)" if messages else ""),
+        f"Saved to {path}" if path else "Could not save the stats file.",
+        "",
+        f"Top {PROFILE_TOP} by self time:"
+    ]
+
+    for i, (key, (primitive_calls, calls, self_time, cumulative_time, callers)) in enumerate(entries[:PROFILE_TOP], 1):
+        lines.append(
+            f"{i}. {profile_function_name(key)}: {format_duration(self_time)} self, "
+            f"{format_duration(cumulative_time)} total, {calls:,} calls"
+        )
+
+    return "\n".join(lines)
+
+# ---------------------------------------------------------
+# HTTP connection pool and retry settings
+# ---------------------------------------------------------
+API_TIMEOUT = 10
+API_POOL_SIZE = 4          # keep-alive connections kept open to GroupMe
+API_MAX_RETRIES = 3        # retries after a 429, 5xx or network error
+API_BACKOFF_BASE = 0.5     # seconds, doubled on every retry (with jitter)
+API_BACKOFF_MAX = 30       # never wait longer than this between retries
+
+_api_session = None
+_api_session_lock = threading.Lock()
+
+# Per-endpoint stats, e.g. api_stats["groups/:id/messages"] = {"count": 3, ...}
+api_stats = {}
+_api_stats_lock = threading.Lock()
+
+def get_api_session():
+    """
+    Returns the shared requests.Session, so every call reuses the same
+    keep-alive connections instead of doing a new TCP+TLS handshake.
+    """
+    global _api_session
+
+    with _api_session_lock:
+        if _api_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _api_session = session
+
+    return _api_session
+
+def api_endpoint_name(path):
+    # groups/12345/messages -> groups/:id/messages
+    return re.sub(r"\d+", ":id", path)
+
+def record_api_call(endpoint, elapsed, status):
+    observe("bot_api_request_duration_seconds", elapsed, endpoint=endpoint)
+    inc_counter("bot_api_requests_total", endpoint=endpoint, status=status)
+
+    with _api_stats_lock:
+        stats = api_stats.setdefault(endpoint, {
+            "count": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0, "last_time": 0.0, "last_status": None
+        })
+        stats["count"] += 1
+        stats["total_time"] += elapsed
+        stats["max_time"] = max(stats["max_time"], elapsed)
+        stats["last_time"] = elapsed
+        stats["last_status"] = status
+        if status == "error" or status == 429 or status >= 500:
+            stats["errors"] += 1
+
+def api_backoff_delay(attempt, retry_after=None):
+    # Honour the server's Retry-After header when it sends one
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0), API_BACKOFF_MAX)
+        except ValueError:
+            pass
+
+    # Full jitter: a random wait up to base * 2^attempt
+    return random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * (2 ** attempt)))
+
+# ---------------------------------------------------------
+# GroupMe API helper
+# ---------------------------------------------------------
+def groupme_api(path, method="GET", data=None, params=None):
+    if method not in ("GET", "POST"):
+        return None
+
+    url = f"{BASE_URL}/{path}"
+    query = {"token": TOKEN}
+    if params:
+        query.update(params)
+
+    endpoint = api_endpoint_name(path)
+    session = get_api_session()
+
+    for attempt in range(API_MAX_RETRIES + 1):
+        retry_after = None
+        start = time.perf_counter()
+
+        try:
+            r = session.request(method, url, params=query, json=data, timeout=API_TIMEOUT)
+        except requests.RequestException as e:
+            record_api_call(endpoint, time.perf_counter() - start, "error")
+            print(f"[ERROR] API request failed: {e}")
+        else:
+            record_api_call(endpoint, time.perf_counter() - start, r.status_code)
+
+            # GroupMe answers 304 with an empty body when there is nothing new
+            if r.status_code == 304:
+                return {"response": None, "meta": {"code": 304}}
+
+            if r.status_code == 429 or r.status_code >= 500:
+                print(f"[WARN] API {endpoint} returned {r.status_code} (attempt {attempt + 1})")
+                retry_after = r.headers.get("Retry-After")
+            else:
+                try:
+                    return r.json()
+                except ValueError as e:
+                    print(f"[ERROR] API returned invalid JSON: {e}")
+                    return None
+
+        if attempt < API_MAX_RETRIES:
+            time.sleep(api_backoff_delay(attempt, retry_after))
+
+    return None
+
+# ---------------------------------------------------------
+# Async GroupMe API helper (used by the asyncio runtime)
+# ---------------------------------------------------------
+_aiohttp_session = None
+
+# Set by watch_for_mentions_async while it runs: called whenever new posts are ready to send
+_outbound_wakeup = None
+
+async def groupme_api_async(path, method="GET", data=None, params=None):
+    # Without aiohttp, run the blocking helper in a worker thread instead
+    if _aiohttp_session is None:
+        return await asyncio.to_thread(groupme_api, path, method, data, params)
+
+    if method not in ("GET", "POST"):
+        return None
+
+    url = f"{BASE_URL}/{path}"
+    query = {"token": TOKEN}
+    if params:
+        query.update({k: str(v) for k, v in params.items()})
+
+    endpoint = api_endpoint_name(path)
+
+    for attempt in range(API_MAX_RETRIES + 1):
+        retry_after = None
+        start = time.perf_counter()
+
+        try:
+            async with _aiohttp_session.request(method, url, params=query, json=data) as r:
+                status = r.status
+                record_api_call(endpoint, time.perf_counter() - start, status)
+
+                if status == 304:
+                    return {"response": None, "meta": {"code": 304}}
+
+                if status == 429 or status >= 500:
+                    print(f"[WARN] API {endpoint} returned {status} (attempt {attempt + 1})")
+                    retry_after = r.headers.get("Retry-After")
+                else:
+                    try:
+                        return await r.json(content_type=None)
+                    except ValueError as e:
+                        print(f"[ERROR] API returned invalid JSON: {e}")
+                        return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            record_api_call(endpoint, time.perf_counter() - start, "error")
+            print(f"[ERROR] API request failed: {e}")
+
+        if attempt < API_MAX_RETRIES:
+            await asyncio.sleep(api_backoff_delay(attempt, retry_after))
+
+    return None
+
+# ---------------------------------------------------------
+# Outbound message queue
+# ---------------------------------------------------------
+# Messages sent while handling one batch ("tick") are merged into one post per
+# group, then paced by a token bucket so we stay under GroupMe's rate limits.
+MAX_MESSAGE_LENGTH = 1000   # GroupMe rejects longer messages
+OUTBOUND_RATE = 1.0         # posts per second added to the token bucket
+OUTBOUND_BURST = 3          # posts that can go out back to back
+OUTBOUND_MAX_QUEUE = 50     # oldest posts are dropped past this many waiting
+
+outbound_stats = {"queued": 0, "merged": 0, "sent": 0, "dropped": 0}
+
+_outbound_lock = threading.Lock()
+_outbound_pending = []      # (group_id, text, use_signature) sent during the current tick
+_outbound_ready = deque()   # (group_id, full_text) posts waiting for a token
+_outbound_tokens = OUTBOUND_BURST
+_outbound_last_refill = time.monotonic()
+
+def queue_message(group_id, text, use_signature=True):
+    with _outbound_lock:
+        _outbound_pending.append((group_id, text, use_signature))
+        outbound_stats["queued"] += 1
+
+def split_outbound_text(text, limit):
+    """
+    Splits text into pieces of at most limit characters, at line breaks where
+    possible. Lines longer than limit are cut wherever they have to be.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    pieces = []
+    current = None
+
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current is not None:
+                pieces.append(current)
+                current = None
+            pieces.append(line[:limit])
+            line = line[limit:]
+
+        if current is None:
+            current = line
+        elif len(current) + 1 + len(line) <= limit:
+            current = f"{current}\n{line}"
+        else:
+            pieces.append(current)
+            current = line
 
-    message_body = {
+    pieces.append(current)
+
+    # GroupMe rejects blank messages too
+    return [piece for piece in pieces if piece.strip()]
+
+def split_outbound_parts(parts):
+    # Texts too long for one post are split first, leaving room for the signature
+    for text, use_signature in parts:
+        limit = MAX_MESSAGE_LENGTH - (len(BOT_SIGNATURE) if use_signature else 0)
+        for piece in split_outbound_text(text, limit):
+            yield piece, use_signature
+
+def merge_outbound_texts(parts):
+    """
+    Joins (text, use_signature) parts into as few posts as fit in MAX_MESSAGE_LENGTH.
+    The signature is added once, at the end of a post, if any part in it asked for it.
+    """
+    posts = []
+    body = None
+    signed = False
+
+    for text, use_signature in split_outbound_parts(parts):
+        if body is not None:
+            joined = f"{body}\n\n{text}"
+            signature = BOT_SIGNATURE if (signed or use_signature) else ""
+            if len(joined) + len(signature) <= MAX_MESSAGE_LENGTH:
+                body = joined
+                signed = signed or use_signature
+                continue
+            posts.append(f"{body}{BOT_SIGNATURE}" if signed else body)
+
+        body = text
+        signed = use_signature
+
+    if body is not None:
+        posts.append(f"{body}{BOT_SIGNATURE}" if signed else body)
+
+    return posts
+
+def end_outbound_tick():
+    # Merge everything sent during this tick into the ready queue
+    with _outbound_lock:
+        if not _outbound_pending:
+            return
+
+        by_group = {}
+        for group_id, text, use_signature in _outbound_pending:
+            by_group.setdefault(group_id, []).append((text, use_signature))
+
+        for group_id, parts in by_group.items():
+            posts = merge_outbound_texts(parts)
+            outbound_stats["merged"] += max(len(parts) - len(posts), 0)
+            for post in posts:
+                _outbound_ready.append((group_id, post))
+
+        _outbound_pending.clear()
+
+        while len(_outbound_ready) > OUTBOUND_MAX_QUEUE:
+            _outbound_ready.popleft()
+            outbound_stats["dropped"] += 1
+            print("[WARN] Outbound queue full, dropped the oldest message")
+
+    if _outbound_wakeup is not None:
+        _outbound_wakeup()
+
+def _refill_outbound_tokens():
+    global _outbound_tokens, _outbound_last_refill
+
+    now = time.monotonic()
+    _outbound_tokens = min(OUTBOUND_BURST, _outbound_tokens + (now - _outbound_last_refill) * OUTBOUND_RATE)
+    _outbound_last_refill = now
+
+def take_outbound_post():
+    """
+    Returns the next (group_id, text) to post if the token bucket allows it, else None.
+    """
+    global _outbound_tokens
+
+    with _outbound_lock:
+        if not _outbound_ready:
+            return None
+
+        _refill_outbound_tokens()
+        if _outbound_tokens < 1:
+            return None
+
+        _outbound_tokens -= 1
+        outbound_stats["sent"] += 1
+        return _outbound_ready.popleft()
+
+def outbound_wait_time():
+    # Seconds until the next ready post can go out, or None if nothing is waiting
+    with _outbound_lock:
+        if not _outbound_ready:
+            return None
+
+        _refill_outbound_tokens()
+        return max(0.0, (1 - _outbound_tokens) / OUTBOUND_RATE)
+
+def get_outbound_stats():
+    with _outbound_lock:
+        return dict(outbound_stats, pending=len(_outbound_pending), depth=len(_outbound_ready))
+
+def outbound_message_body(text):
+    return {
         "message": {
             "source_guid": str(uuid.uuid4()),
-            "text": full_text
+            "text": text
         }
     }
 
-    return groupme_api(f"groups/{GROUP_ID}/messages", method="POST", data=message_body)
+def flush_outbound():
+    # Send whatever the token bucket allows right now; the polling loop calls this
+    # again when outbound_wait_time() says the next one can go
+    while True:
+        post = take_outbound_post()
+        if post is None:
+            return
+
+        group_id, text = post
+        groupme_api(f"groups/{group_id}/messages", method="POST", data=outbound_message_body(text))
 
 # ---------------------------------------------------------
-# DAILY LEADERBOARD SYSTEM
+# Current group
 # ---------------------------------------------------------
-LEADERBOARD_FILE = "daily_leaderboard.json"
+# The group whose messages are being handled. Replies, triggers and
+# leaderboards all follow it, so handlers never pass a group ID around.
+_current_group = contextvars.ContextVar("current_group", default=None)
 
-def load_daily_leaderboard():
-    if not os.path.exists(LEADERBOARD_FILE):
-        return {
-            "tictactoe": {},
-            "connectfour": {},
-            "checkers": {},
-            "last_reset": ""
-        }
+def current_group_id():
+    return _current_group.get() or GROUP_IDS[0]
+
+def run_in_group(group_id, func, *args):
+    token = _current_group.set(group_id)
     try:
-        with open(LEADERBOARD_FILE, "r") as f:
+        return func(*args)
+    finally:
+        _current_group.reset(token)
+
+def group_file(path, group_id=None):
+    # daily_leaderboard.json -> daily_leaderboard_<group id>.json for every group but the first
+    group_id = group_id or current_group_id()
+    if group_id == GROUP_IDS[0]:
+        return path
+
+    root, ext = os.path.splitext(path)
+    return f"{root}_{group_id}{ext}"
+
+# ---------------------------------------------------------
+# Unified message sender
+# ---------------------------------------------------------
+def send_message(text, use_signature=True):
+    # During a backfill, handlers still update state but their replies are dropped
+    suppressed = _suppressed_replies.get()
+    if suppressed is not None:
+        suppressed.append(text)
+        return
+
+    # Queued; the polling loop merges and posts it at the end of the current tick
+    queue_message(current_group_id(), text, use_signature)
+
+# ---------------------------------------------------------
+# LEADERBOARD STORE
+# ---------------------------------------------------------
+# Leaderboards are kept in memory, and every change is appended to an event log
+# next to the file (daily_leaderboard.json.log), one JSON line per event. A win
+# costs one small append instead of rewriting the whole file.
+#
+# At startup the file itself (the snapshot) is loaded and the log is replayed
+# on top of it. Every LEADERBOARD_FLUSH_INTERVAL seconds, logs with at least
+# LEADERBOARD_COMPACT_EVENTS events are compacted: the state is written to a new
+# snapshot, renamed over the old one, and the log is emptied. The snapshot keeps
+# the seq of the last event in it ("log_seq"), so no event is applied twice if
+# the bot stops between the rename and emptying the log.
+LEADERBOARD_FLUSH_INTERVAL = 30
+LEADERBOARD_COMPACT_EVENTS = 200
+LEADERBOARD_FSYNC = True    # also survive a power cut, not just a crash (one fsync per event)
+
+_leaderboard_lock = threading.RLock()
+_leaderboards = {}               # file name -> state dict
+_leaderboard_seq = {}            # file name -> seq of the last event applied
+_leaderboard_snapshot_seq = {}   # file name -> seq of the last event in the snapshot
+_leaderboard_logs = {}           # file name -> log file open for appending
+_leaderboards_dirty = set()      # file names to compact at the next flush
+_leaderboard_flusher = None
+
+def read_json_file(path, default_factory):
+    if not os.path.exists(path):
+        return default_factory()
+
+    start = time.perf_counter()
+    try:
+        with open(path, "r") as f:
             return json.load(f)
-    except:
-        return {
-            "tictactoe": {},
-            "connectfour": {},
-            "checkers": {},
-            "last_reset": ""
-        }
+    except ValueError as e:
+        # Keep the broken file for a look by hand instead of overwriting it later
+        print(f"[ERROR] {path} is not valid JSON ({e}), moved it to {path}.corrupt")
+        try:
+            os.replace(path, f"{path}.corrupt")
+        except OSError:
+            pass
+        return default_factory()
+    except OSError as e:
+        print(f"[ERROR] Could not read {path}: {e}")
+        return default_factory()
+    finally:
+        observe("bot_file_io_duration_seconds", time.perf_counter() - start, op="read")
+
+def write_json_file(path, text):
+    # Write to a temp file first so a crash never leaves a half-written file behind
+    start = time.perf_counter()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    observe("bot_file_io_duration_seconds", time.perf_counter() - start, op="write")
+
+def leaderboard_log_path(path):
+    return f"{path}.log"
+
+def read_leaderboard_log(path, after_seq):
+    # Events in the log newer than after_seq. A half-written last line (the bot died mid-append) is skipped.
+    log_path = leaderboard_log_path(path)
+    try:
+        with open(log_path, "r") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        print(f"[ERROR] Could not read {log_path}: {e}")
+        return []
+
+    events = []
+    for number, line in enumerate(lines, 1):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            print(f"[WARN] Skipping unreadable line {number} of {log_path}")
+            continue
 
-def save_daily_leaderboard(lb):
-    with open(LEADERBOARD_FILE, "w") as f:
-        json.dump(lb, f)
+        if event.get("seq", 0) > after_seq:
+            events.append(event)
+
+    return events
+
+def apply_leaderboard_event(state, event):
+    # Returns the new state: "set" replaces it, "win" and "point" add one
+    op = event["op"]
+
+    if op == "set":
+        return event["state"]
+
+    if op == "win":
+        entry = state.setdefault(event["game"], {}).setdefault(event["user_id"], {"name": event["name"], "wins": 0})
+        entry["wins"] += 1
+    elif op == "point":
+        entry = state.setdefault("leaders", {}).setdefault(event["user_id"], {"name": event["name"], "points": 0})
+        entry["points"] += 1
+
+    return state
+
+def get_leaderboard_state(path, default_factory):
+    with _leaderboard_lock:
+        if path not in _leaderboards:
+            state = read_json_file(path, default_factory)
+            seq = state.pop("log_seq", 0)
+            _leaderboard_snapshot_seq[path] = seq
+
+            events = read_leaderboard_log(path, seq)
+            for event in events:
+                state = apply_leaderboard_event(state, event)
+                seq = max(seq, event["seq"])
+
+            _leaderboards[path] = state
+            _leaderboard_seq[path] = seq
+
+            # Start from a clean log, which also drops any half-written line
+            try:
+                log_size = os.path.getsize(leaderboard_log_path(path))
+            except OSError:
+                log_size = 0
+            if log_size:
+                compact_leaderboard(path)
+
+            start_leaderboard_flusher()
+        return _leaderboards[path]
+
+def append_leaderboard_event(path, event, default_factory):
+    with _leaderboard_lock:
+        state = get_leaderboard_state(path, default_factory)
+        seq = _leaderboard_seq[path] + 1
+        line = json.dumps(dict(event, seq=seq)) + "\n"
+
+        start = time.perf_counter()
+        try:
+            log = _leaderboard_logs.get(path)
+            if log is None:
+                log = _leaderboard_logs[path] = open(leaderboard_log_path(path), "a")
+            log.write(line)
+            log.flush()
+            if LEADERBOARD_FSYNC:
+                os.fsync(log.fileno())
+        except OSError as e:
+            # Still applied in memory; the next flush writes a full snapshot instead
+            print(f"[ERROR] Could not append to {leaderboard_log_path(path)}: {e}")
+            _leaderboards_dirty.add(path)
+        observe("bot_file_io_duration_seconds", time.perf_counter() - start, op="append")
+
+        _leaderboards[path] = apply_leaderboard_event(state, event)
+        _leaderboard_seq[path] = seq
+
+def set_leaderboard_state(path, data):
+    # A whole new state (e.g. a reset); compacted at the next flush so the log stays short
+    append_leaderboard_event(path, {"op": "set", "state": data}, dict)
+    with _leaderboard_lock:
+        _leaderboards_dirty.add(path)
+
+def compact_leaderboard(path):
+    # Caller holds _leaderboard_lock
+    seq = _leaderboard_seq[path]
+    try:
+        write_json_file(path, json.dumps(dict(_leaderboards[path], log_seq=seq)))
+    except OSError as e:
+        print(f"[ERROR] Could not save {path}: {e}")
+        _leaderboards_dirty.add(path)
+        return False
+
+    _leaderboard_snapshot_seq[path] = seq
+    _leaderboards_dirty.discard(path)
+
+    # Everything in the log is in the snapshot now
+    log = _leaderboard_logs.pop(path, None)
+    if log is not None:
+        log.close()
+    try:
+        open(leaderboard_log_path(path), "w").close()
+    except OSError as e:
+        print(f"[WARN] Could not empty {leaderboard_log_path(path)}: {e}")
 
-def add_daily_win(game, user_id, user_name):
-    lb = load_daily_leaderboard()
+    return True
 
-    if game not in lb:
-        lb[game] = {}
+def flush_leaderboards(force=True):
+    """
+    Compacts logs that need it: ones with LEADERBOARD_COMPACT_EVENTS or more
+    events, after a reset or a failed append, or with force (at exit) any
+    log that isn't empty.
+    """
+    with _leaderboard_lock:
+        for path in list(_leaderboards):
+            pending = _leaderboard_seq[path] - _leaderboard_snapshot_seq[path]
+            if path in _leaderboards_dirty or pending >= LEADERBOARD_COMPACT_EVENTS or (force and pending):
+                compact_leaderboard(path)
 
-    if user_id not in lb[game]:
-        lb[game][user_id] = {"name": user_name, "wins": 0}
+def start_leaderboard_flusher():
+    global _leaderboard_flusher
 
-    lb[game][user_id]["wins"] += 1
-    save_daily_leaderboard(lb)
+    if _leaderboard_flusher is not None:
+        return
 
-def format_top_three(game_data):
-    if not game_data:
-        return "No winners yet."
+    def flush_loop():
+        while True:
+            time.sleep(LEADERBOARD_FLUSH_INTERVAL)
+            flush_leaderboards(force=False)
 
-    sorted_players = sorted(
-        game_data.values(),
-        key=lambda x: x["wins"],
-        reverse=True
-    )
+    _leaderboard_flusher = threading.Thread(target=flush_loop, daemon=True)
+    _leaderboard_flusher.start()
+    atexit.register(flush_leaderboards)
+
+# ---------------------------------------------------------
+# LEADERBOARD FILES (used by the JSON storage backend)
+# ---------------------------------------------------------
+LEADERBOARD_FILE = "daily_leaderboard.json"
+MONTHLY_FILE = "monthly_leaderboard.json"
+
+def empty_daily_leaderboard(last_reset=""):
+    return {
+        "tictactoe": {},
+        "connectfour": {},
+        "checkers": {},
+        "last_reset": last_reset
+    }
+
+def load_daily_leaderboard(path=LEADERBOARD_FILE):
+    return get_leaderboard_state(path, empty_daily_leaderboard)
+
+def save_daily_leaderboard(lb, path=LEADERBOARD_FILE):
+    set_leaderboard_state(path, lb)
+
+def empty_monthly(last_month=""):
+    return {"leaders": {}, "last_month": last_month}
+
+def load_monthly(path=MONTHLY_FILE):
+    return get_leaderboard_state(path, empty_monthly)
+
+def save_monthly(data, path=MONTHLY_FILE):
+    set_leaderboard_state(path, data)
+
+# ---------------------------------------------------------
+# STORAGE BACKENDS
+# ---------------------------------------------------------
+# Both backends provide the same methods:
+#   get_last_reset() / reset_daily(day)
+#   record_win(game, user_id, user_name) / top_daily(game, limit) / daily_totals()
+#   get_last_month() / reset_monthly(month) / add_monthly_point(user_id, user_name) / top_monthly(limit)
+#   load_triggers() / add_trigger(trigger) / remove_trigger(trigger_id) / triggers_version()
+class JsonStorage:
+    """
+    Default backend: the original JSON files, kept in memory by the leaderboard
+    store (wins and points go to its event log).
+    Only the current day and month are kept. Each group has its own set of files.
+    """
+
+    def __init__(self, group_id=None):
+        self.leaderboard_file = group_file(LEADERBOARD_FILE, group_id)
+        self.monthly_file = group_file(MONTHLY_FILE, group_id)
+        self.trigger_file = group_file(TRIGGER_FILE, group_id)
+
+    # ----- daily -----
+    def get_last_reset(self):
+        return load_daily_leaderboard(self.leaderboard_file)["last_reset"]
+
+    def reset_daily(self, day):
+        save_daily_leaderboard(empty_daily_leaderboard(day), self.leaderboard_file)
+
+    def record_win(self, game, user_id, user_name):
+        append_leaderboard_event(
+            self.leaderboard_file,
+            {"op": "win", "game": game, "user_id": user_id, "name": user_name},
+            empty_daily_leaderboard
+        )
+
+    def top_daily(self, game, limit):
+        game_data = load_daily_leaderboard(self.leaderboard_file).get(game, {})
+        return heapq.nlargest(limit, game_data.values(), key=lambda x: x["wins"])
+
+    def daily_totals(self):
+        lb = load_daily_leaderboard(self.leaderboard_file)
+        combined = {}
+
+        for game in DAILY_GAMES:
+            for uid, entry in lb.get(game, {}).items():
+                combined.setdefault(uid, {"name": entry["name"], "wins": 0})
+                combined[uid]["wins"] += entry["wins"]
+
+        return combined
+
+    # ----- monthly -----
+    def get_last_month(self):
+        return load_monthly(self.monthly_file)["last_month"]
+
+    def reset_monthly(self, month):
+        save_monthly(empty_monthly(month), self.monthly_file)
+
+    def add_monthly_point(self, user_id, user_name):
+        append_leaderboard_event(
+            self.monthly_file,
+            {"op": "point", "user_id": user_id, "name": user_name},
+            empty_monthly
+        )
+
+    def top_monthly(self, limit):
+        return heapq.nlargest(limit, load_monthly(self.monthly_file)["leaders"].values(), key=lambda x: x["points"])
+
+    # ----- triggers -----
+    def load_triggers(self):
+        return read_json_file(self.trigger_file, lambda: {"next_id": 1, "triggers": {}})
+
+    def save_triggers(self, data):
+        write_json_file(self.trigger_file, json.dumps(data))
+
+    def add_trigger(self, trigger):
+        data = self.load_triggers()
+
+        trigger_id = str(data["next_id"])
+        data["next_id"] += 1
+        data["triggers"][trigger_id] = trigger
+
+        self.save_triggers(data)
+        return trigger_id
+
+    def triggers_version(self):
+        # Changes whenever triggers.json is rewritten, by us or by hand
+        try:
+            return os.stat(self.trigger_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def remove_trigger(self, trigger_id):
+        data = self.load_triggers()
+
+        trigger = data["triggers"].pop(trigger_id, None)
+        if trigger is not None:
+            self.save_triggers(data)
+
+        return trigger
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+-- One row per win, kept forever
+CREATE TABLE IF NOT EXISTS wins (
+    id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,
+    game TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS wins_by_user ON wins (user_id, game);
+CREATE INDEX IF NOT EXISTS wins_by_day ON wins (day, game);
+
+-- Running per-day totals, so top-N is an index scan
+CREATE TABLE IF NOT EXISTS daily_wins (
+    day TEXT NOT NULL,
+    game TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    wins INTEGER NOT NULL,
+    PRIMARY KEY (day, game, user_id)
+);
+CREATE INDEX IF NOT EXISTS daily_wins_top ON daily_wins (day, game, wins DESC);
+
+CREATE TABLE IF NOT EXISTS monthly_points (
+    month TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (month, user_id)
+);
+CREATE INDEX IF NOT EXISTS monthly_points_top ON monthly_points (month, points DESC);
+
+CREATE TABLE IF NOT EXISTS triggers (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+class SqliteStorage:
+    """
+    SQLite backend (WAL mode). Every win is stored as its own row, so years of
+    history can be kept while leaderboard reads stay index lookups.
+    """
+
+    def __init__(self, path, group_id=None):
+        self.path = path
+        self.group_id = group_id
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SQLITE_SCHEMA)
+        self.in_transaction = False
+
+        if self.get_meta("migrated_from_json") is None:
+            migrate_json_to_sqlite(self)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        # Commits when the outermost transaction ends and rolls back if it fails,
+        # so several writes (like the JSON import) can be made all or nothing
+        with self.lock:
+            if self.in_transaction:
+                yield self.db
+                return
+
+            self.in_transaction = True
+            try:
+                with self.db:
+                    yield self.db
+            finally:
+                self.in_transaction = False
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.transaction():
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ----- daily -----
+    def get_last_reset(self):
+        return self.get_meta("last_reset", "")
+
+    def reset_daily(self, day):
+        # Old days stay in the database as history
+        self.set_meta("last_reset", day)
+
+    def current_day(self):
+        return self.get_last_reset() or time.strftime("%Y-%m-%d")
+
+    def record_win(self, game, user_id, user_name, count=1, day=None):
+        day = day or self.current_day()
+
+        with self.transaction():
+            self.db.executemany(
+                "INSERT INTO wins (day, game, user_id, user_name, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(day, game, user_id, user_name, time.time())] * count
+            )
+            self.db.execute(
+                "INSERT INTO daily_wins (day, game, user_id, user_name, wins) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, game, user_id) DO UPDATE SET wins = wins + excluded.wins, user_name = excluded.user_name",
+                (day, game, user_id, user_name, count)
+            )
+
+    def top_daily(self, game, limit):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT user_name, wins FROM daily_wins WHERE day = ? AND game = ? ORDER BY wins DESC LIMIT ?",
+                (self.current_day(), game, limit)
+            ).fetchall()
+        return [{"name": name, "wins": wins} for name, wins in rows]
+
+    def daily_totals(self):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT user_id, MAX(user_name), SUM(wins) FROM daily_wins WHERE day = ? GROUP BY user_id",
+                (self.current_day(),)
+            ).fetchall()
+        return {uid: {"name": name, "wins": wins} for uid, name, wins in rows}
+
+    # ----- monthly -----
+    def get_last_month(self):
+        return self.get_meta("last_month", "")
+
+    def reset_monthly(self, month):
+        self.set_meta("last_month", month)
+
+    def add_monthly_point(self, user_id, user_name, points=1):
+        with self.transaction():
+            self.db.execute(
+                "INSERT INTO monthly_points (month, user_id, user_name, points) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (month, user_id) DO UPDATE SET points = points + excluded.points, user_name = excluded.user_name",
+                (self.get_last_month(), user_id, user_name, points)
+            )
+
+    def top_monthly(self, limit):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT user_name, points FROM monthly_points WHERE month = ? ORDER BY points DESC LIMIT ?",
+                (self.get_last_month(), limit)
+            ).fetchall()
+        return [{"name": name, "points": points} for name, points in rows]
+
+    # ----- triggers -----
+    def load_triggers(self):
+        with self.lock:
+            rows = self.db.execute("SELECT id, data FROM triggers ORDER BY id").fetchall()
+        return {
+            "next_id": int(self.get_meta("trigger_next_id", 1)),
+            "triggers": {str(tid): json.loads(data) for tid, data in rows}
+        }
+
+    def add_trigger(self, trigger, trigger_id=None):
+        with self.transaction():
+            if trigger_id is None:
+                trigger_id = int(self.get_meta("trigger_next_id", 1))
+            self.db.execute("INSERT INTO triggers (id, data) VALUES (?, ?)", (int(trigger_id), json.dumps(trigger)))
+            next_id = max(int(self.get_meta("trigger_next_id", 1)), int(trigger_id) + 1)
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('trigger_next_id', ?)", (str(next_id),))
+        return str(trigger_id)
+
+    def triggers_version(self):
+        # Changes when another connection writes to the database; our own
+        # writes go through add/remove_trigger, which invalidate the matcher directly
+        with self.lock:
+            return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def remove_trigger(self, trigger_id):
+        if not str(trigger_id).isdigit():
+            return None
+
+        with self.transaction():
+            row = self.db.execute("SELECT data FROM triggers WHERE id = ?", (int(trigger_id),)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("DELETE FROM triggers WHERE id = ?", (int(trigger_id),))
+        return json.loads(row[0])
+
+def migrate_json_to_sqlite(storage):
+    """
+    One-shot import of the JSON leaderboard and trigger files into a new SQLite database.
+    Runs as one transaction with the "migrated" marker, so an import that fails
+    halfway leaves nothing behind and is tried again on the next start.
+    """
+    # Leaderboards are read with their event logs, which may hold wins the snapshot doesn't have yet
+    daily = get_leaderboard_state(group_file(LEADERBOARD_FILE, storage.group_id), empty_daily_leaderboard)
+    monthly = get_leaderboard_state(group_file(MONTHLY_FILE, storage.group_id), empty_monthly)
+    triggers = read_json_file(group_file(TRIGGER_FILE, storage.group_id), lambda: {"next_id": 1, "triggers": {}})
+
+    with storage.transaction():
+        if daily["last_reset"]:
+            storage.reset_daily(daily["last_reset"])
+            for game in DAILY_GAMES:
+                for uid, entry in daily.get(game, {}).items():
+                    storage.record_win(game, uid, entry["name"], count=entry["wins"])
+
+        if monthly["last_month"]:
+            storage.reset_monthly(monthly["last_month"])
+            for uid, entry in monthly["leaders"].items():
+                storage.add_monthly_point(uid, entry["name"], points=entry["points"])
+
+        # IDs are kept, except ones edited by hand into something that isn't a number:
+        # those get new IDs after the rest instead of failing the whole import
+        renumbered = []
+        for tid, trigger in triggers["triggers"].items():
+            if str(tid).isdigit():
+                storage.add_trigger(trigger, trigger_id=tid)
+            else:
+                renumbered.append((tid, trigger))
+
+        next_id = str(triggers.get("next_id", 1))
+        storage.set_meta("trigger_next_id", max(int(storage.get_meta("trigger_next_id", 1)), int(next_id) if next_id.isdigit() else 1))
+
+        for tid, trigger in renumbered:
+            new_id = storage.add_trigger(trigger)
+            print(f"[WARN] Trigger ID {tid!r} in {group_file(TRIGGER_FILE, storage.group_id)} is not a number, imported as ID {new_id}")
+
+        storage.set_meta("migrated_from_json", time.strftime("%Y-%m-%d %H:%M:%S"))
+
+    print(f"Imported JSON leaderboards and triggers into {storage.path}")
+
+_storages = {}   # group_id -> storage backend
+_storage_lock = threading.Lock()
+
+def get_storage(group_id=None):
+    # Storage for the given group (the current one by default)
+    group_id = group_id or current_group_id()
+
+    with _storage_lock:
+        if group_id not in _storages:
+            if STORAGE_BACKEND == "sqlite":
+                _storages[group_id] = SqliteStorage(group_file(SQLITE_FILE, group_id), group_id)
+            else:
+                _storages[group_id] = JsonStorage(group_id)
+
+        return _storages[group_id]
+
+# ---------------------------------------------------------
+# DAILY LEADERBOARD SYSTEM
+# ---------------------------------------------------------
+DAILY_GAMES = ["tictactoe", "connectfour", "checkers"]
+
+def add_daily_win(game, user_id, user_name):
+    get_storage().record_win(game, user_id, user_name)
+
+def format_top_three(top_entries):
+    if not top_entries:
+        return "No winners yet."
 
     lines = []
-    for i, entry in enumerate(sorted_players[:3]):
+    for i, entry in enumerate(top_entries[:3]):
         lines.append(f"{i+1}. {entry['name']} — {entry['wins']} wins")
 
     return "\n".join(lines)
 
 def get_daily_leaderboard_text():
-    lb = load_daily_leaderboard()
+    storage = get_storage()
 
     return (
         "🏆 **Daily Game Leaders** 🏆\n\n"
         "🎮 **Tic Tac Toe**\n" +
-        format_top_three(lb["tictactoe"]) + "\n\n" +
+        format_top_three(storage.top_daily("tictactoe", 3)) + "\n\n" +
         "🟦 **Connect Four**\n" +
-        format_top_three(lb["connectfour"]) + "\n\n" +
+        format_top_three(storage.top_daily("connectfour", 3)) + "\n\n" +
         "♟️ **Checkers**\n" +
-        format_top_three(lb["checkers"])
+        format_top_three(storage.top_daily("checkers", 3))
     )
 
 def get_daily_winners_text():
-    lb = load_daily_leaderboard()
+    storage = get_storage()
 
     return (
         "🏁 **Winners of the Day** 🏁\n\n"
         "🎮 **Tic Tac Toe**\n" +
-        format_top_three(lb["tictactoe"]) + "\n\n" +
+        format_top_three(storage.top_daily("tictactoe", 3)) + "\n\n" +
         "🟦 **Connect Four**\n" +
-        format_top_three(lb["connectfour"]) + "\n\n" +
+        format_top_three(storage.top_daily("connectfour", 3)) + "\n\n" +
         "♟️ **Checkers**\n" +
-        format_top_three(lb["checkers"])
+        format_top_three(storage.top_daily("checkers", 3))
     )
 
 def reset_daily_leaderboard_if_needed():
-    lb = load_daily_leaderboard()
+    storage = get_storage()
+    last_reset = storage.get_last_reset()
     today = time.strftime("%Y-%m-%d")
 
-    if lb["last_reset"] != today:
+    if last_reset != today:
 
         # Send winners of the previous day
-        if lb["last_reset"] != "":
+        if last_reset != "":
             send_message(get_daily_winners_text())
 
-            # Determine daily champion(s)
-            combined = {}
-
-            # Merge all game wins into one total per user
-            for game in ["tictactoe", "connectfour", "checkers"]:
-                for uid, entry in lb[game].items():
-                    combined.setdefault(uid, {"name": entry["name"], "wins": 0})
-                    combined[uid]["wins"] += entry["wins"]
+            # Determine daily champion(s): all game wins merged into one total per user
+            combined = storage.daily_totals()
 
             if combined:
                 # Find highest score
@@ -185,13 +1497,7 @@ def reset_daily_leaderboard_if_needed():
                         add_monthly_point(uid, entry["name"])
 
         # Reset daily leaderboard
-        lb = {
-            "tictactoe": {},
-            "connectfour": {},
-            "checkers": {},
-            "last_reset": today
-        }
-        save_daily_leaderboard(lb)
+        storage.reset_daily(today)
 
         # Reset monthly if needed
         monthly_reset_if_needed()
@@ -199,91 +1505,245 @@ def reset_daily_leaderboard_if_needed():
 # ---------------------------------------------------------
 # MONTHLY LEADERBOARD SYSTEM
 # ---------------------------------------------------------
-MONTHLY_FILE = "monthly_leaderboard.json"
-
-def load_monthly():
-    if not os.path.exists(MONTHLY_FILE):
-        return {"leaders": {}, "last_month": ""}
-    try:
-        with open(MONTHLY_FILE, "r") as f:
-            return json.load(f)
-    except:
-        return {"leaders": {}, "last_month": ""}
-
-def save_monthly(data):
-    with open(MONTHLY_FILE, "w") as f:
-        json.dump(data, f)
-
 def add_monthly_point(user_id, user_name):
-    data = load_monthly()
-    if user_id not in data["leaders"]:
-        data["leaders"][user_id] = {"name": user_name, "points": 0}
-    data["leaders"][user_id]["points"] += 1
-    save_monthly(data)
+    get_storage().add_monthly_point(user_id, user_name)
 
 def get_monthly_text():
-    data = load_monthly()
-    leaders = data["leaders"]
+    top = get_storage().top_monthly(5)
 
-    if not leaders:
+    if not top:
         return "No monthly points recorded yet."
 
-    sorted_lb = sorted(leaders.values(), key=lambda x: x["points"], reverse=True)
-
     lines = ["🌙 **Monthly Leaders** 🌙"]
-    for i, entry in enumerate(sorted_lb[:5]):
+    for i, entry in enumerate(top):
         lines.append(f"{i+1}. {entry['name']} — {entry['points']} points")
 
     return "\n".join(lines)
 
 def monthly_reset_if_needed():
-    data = load_monthly()
+    storage = get_storage()
     current_month = time.strftime("%Y-%m")
 
-    if data["last_month"] != current_month:
+    if storage.get_last_month() != current_month:
         # Reset monthly leaderboard
-        data = {"leaders": {}, "last_month": current_month}
-        save_monthly(data)
+        storage.reset_monthly(current_month)
 
 # ---------------------------------------------------------
-# Helper: Check if a user is already in ANY game
+# GAME SESSIONS
 # ---------------------------------------------------------
+# Every running game is a GameSession kept in game_sessions under its session
+# ID, so any number of games can run at once. user_sessions maps each human
+# player to their session, which makes "is this user already playing?" a
+# dict lookup.
+GAME_INACTIVITY_TIMEOUT = 300   # seconds
+
+GAME_NAMES = {
+    "tictactoe": "Tic Tac Toe",
+    "connectfour": "Connect Four",
+    "checkers": "Checkers"
+}
+
+class GameSession:
+    __slots__ = (
+        "session_id", "game", "group_id",
+        "player1_id", "player1_name", "player2_id", "player2_name",
+        "board", "current_player", "last_activity", "ai_enabled"
+    )
+
+    def __init__(self, session_id, game, group_id, player1_id, player1_name, board):
+        self.session_id = session_id
+        self.game = game
+        self.group_id = group_id
+        self.player1_id = player1_id
+        self.player1_name = player1_name
+        self.player2_id = None
+        self.player2_name = None
+        self.board = board
+        self.current_player = "X"
+        self.last_activity = time.time()
+        self.ai_enabled = False
+
+game_sessions = {}    # session_id -> GameSession, oldest first
+user_sessions = {}    # user_id -> session_id of the game they are playing
+_session_ids = itertools.count(1)
+
+def create_game_session(game, player1_id, player1_name, board, group_id=None):
+    session = GameSession(next(_session_ids), game, group_id or current_group_id(), player1_id, player1_name, board)
+    game_sessions[session.session_id] = session
+    user_sessions[player1_id] = session.session_id
+    return session
+
+def join_game_session(session, player2_id, player2_name):
+    session.player2_id = player2_id
+    session.player2_name = player2_name
+    session.last_activity = time.time()
+
+    if player2_id != "AI":
+        user_sessions[player2_id] = session.session_id
+
+def end_game_session(session, reason=None):
+    game_sessions.pop(session.session_id, None)
+
+    for uid in (session.player1_id, session.player2_id):
+        if user_sessions.get(uid) == session.session_id:
+            del user_sessions[uid]
+
+    if reason:
+        # Inactivity resets happen outside any message, so address the game's own group
+        queue_message(session.group_id, reason)
+
+def get_user_session(user_id, game=None):
+    # Only games in the group the message came from
+    session = game_sessions.get(user_sessions.get(user_id))
+    if session is None or session.group_id != current_group_id():
+        return None
+    if game is not None and session.game != game:
+        return None
+    return session
+
+def find_open_session(game, session_id=None):
+    # The oldest game of this kind in this group still waiting for a second player (or a specific one)
+    if session_id is not None:
+        session = game_sessions.get(session_id)
+        candidates = [session] if session is not None else []
+    else:
+        candidates = game_sessions.values()
+
+    group_id = current_group_id()
+    for session in candidates:
+        if session.game == game and session.group_id == group_id and session.player2_id is None:
+            return session
+
+    return None
+
+def count_game_sessions(game):
+    group_id = current_group_id()
+    return sum(1 for session in game_sessions.values() if session.game == game and session.group_id == group_id)
+
 def user_is_in_any_game(user_id):
-    global ttt_active, ttt_player1_id, ttt_player2_id
-    global c4_active, c4_player1_id, c4_player2_id
+    return user_id in user_sessions
 
-    if 'ttt_active' in globals() and ttt_active:
-        if user_id == ttt_player1_id or user_id == ttt_player2_id:
-            return True
+def format_timeout(seconds):
+    # 300 -> "5 minutes", 90 -> "90 seconds"
+    seconds = int(seconds)
+    if seconds >= 60 and seconds % 60 == 0:
+        count, unit = seconds // 60, "minute"
+    else:
+        count, unit = seconds, "second"
+    return f"{count} {unit}{'' if count == 1 else 's'}"
 
-    if 'c4_active' in globals() and c4_active:
-        if user_id == c4_player1_id or user_id == c4_player2_id:
-            return True
+def check_game_inactivity():
+    now = time.time()
 
-    return False
+    for session in list(game_sessions.values()):
+        if now - session.last_activity > GAME_INACTIVITY_TIMEOUT:
+            end_game_session(
+                session,
+                f"The {GAME_NAMES[session.game]} game started by {session.player1_name} "
+                f"has been reset due to {format_timeout(GAME_INACTIVITY_TIMEOUT)} of inactivity."
+            )
 
 # ---------------------------------------------------------
 # CUSTOM TRIGGERS (ADMIN-MANAGED)
 # ---------------------------------------------------------
 
 def load_triggers():
-    if not os.path.exists(TRIGGER_FILE):
-        return {"next_id": 1, "triggers": {}}
-    try:
-        with open(TRIGGER_FILE, "r") as f:
-            return json.load(f)
-    except:
-        return {"next_id": 1, "triggers": {}}
+    return get_storage().load_triggers()
 
-def save_triggers(data):
-    with open(TRIGGER_FILE, "w") as f:
-        json.dump(data, f)
+# ---------------------------------------------------------
+# Trigger matcher: all trigger words compiled into a few regexes
+# ---------------------------------------------------------
+# Triggers are grouped by mode (case sensitive or not, whole word or not) and
+# each group becomes one regex built from a prefix tree of the words, so the
+# cost per message barely grows with the number of triggers. Each word ends in
+# an empty named group, so m.lastgroup says which word matched (the matched
+# text can't be used: "ſus" matches "sus" case-insensitively but doesn't
+# lowercase to it). The regexes are only rebuilt when the trigger set changes.
+# Every group has its own matcher.
+_trigger_matchers = {}   # group_id -> matcher
+_trigger_matcher_lock = threading.Lock()
+
+def trie_pattern(words):
+    # {"cat": "t0", "car": "t1", "cart": "t2"} -> "ca(?:r(?:t(?P<t2>)|(?P<t1>))|t(?P<t0>))":
+    # shared prefixes are matched once, and each word ends in its own named group
+    trie = {}
+    for word, name in words.items():
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = name
+
+    def walk(node):
+        branches = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            # A word ends here; the longer words are tried first
+            branches.append(f"(?P<{node['']}>)")
+
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return walk(trie)
+
+def build_trigger_matcher(triggers, version):
+    groups = {}   # (case_sensitive, whole_word) -> {word: (trigger_id, trigger)}
+
+    for tid, trigger in sorted(triggers.items(), key=lambda item: int(item[0]) if item[0].isdigit() else 0):
+        case_sensitive = trigger.get("case_sensitive", False)
+        whole_word = trigger.get("whole_word", False)
+        word = trigger["word"] if case_sensitive else trigger["word"].lower()
+        if word:
+            # The oldest trigger wins if the same word was added twice
+            groups.setdefault((case_sensitive, whole_word), {}).setdefault(word, (int(tid) if tid.isdigit() else 0, trigger))
+
+    patterns = []
+    for (case_sensitive, whole_word), words in groups.items():
+        names = {word: f"t{i}" for i, word in enumerate(words)}
+        lookup = {names[word]: entry for word, entry in words.items()}   # group name -> (trigger_id, trigger)
+
+        pattern = trie_pattern(names)
+        if whole_word:
+            pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+        flags = 0 if case_sensitive else re.IGNORECASE
+        patterns.append((re.compile(pattern, flags), lookup))
+
+    return {"version": version, "patterns": patterns}
+
+def get_trigger_matcher():
+    group_id = current_group_id()
+    storage = get_storage(group_id)
+    version = storage.triggers_version()
+
+    with _trigger_matcher_lock:
+        matcher = _trigger_matchers.get(group_id)
+        if matcher is None or matcher["version"] != version:
+            matcher = build_trigger_matcher(storage.load_triggers()["triggers"], version)
+            _trigger_matchers[group_id] = matcher
+        return matcher
+
+def invalidate_trigger_matcher():
+    with _trigger_matcher_lock:
+        _trigger_matchers.pop(current_group_id(), None)
+
+def match_trigger(text):
+    """
+    Returns the trigger whose word appears earliest in the text, or None. If
+    several start at the same spot, the longest word wins within one mode and
+    the oldest trigger between modes.
+    """
+    best = None
 
-def handle_addtrigger(msg):
-    raw_text = msg.get("text") or ""
-    if not raw_text.startswith("!addtrigger"):
-        return
+    for pattern, lookup in get_trigger_matcher()["patterns"]:
+        m = pattern.search(text)
+        if not m:
+            continue
+
+        trigger_id, trigger = lookup[m.lastgroup]
+        key = (m.start(), trigger_id)
+        if best is None or key < best[0]:
+            best = (key, trigger)
+
+    return best[1] if best else None
 
+def handle_addtrigger(msg, cmd):
     sender_id = str(msg.get("sender_id"))
 
     admin_ids = get_admin_ids()
@@ -299,63 +1759,66 @@ def handle_addtrigger(msg):
         send_message("Only admins can add triggers.")
         return
 
-    if '"' not in raw_text:
-        send_message('Usage: !addtrigger word "response text"')
+    if '"' not in cmd.args:
+        send_message('Usage: !addtrigger [-w] [-c] word "response text"')
         return
 
     try:
-        before, quoted = raw_text.split('"', 1)
+        before, quoted = cmd.args.split('"', 1)
         response, _ = quoted.split('"', 1)
-        trigger_word = before.split()[1].lower()
+
+        # Optional flags before the word: -w = whole word only, -c = case sensitive
+        args = before.split()
+        flags = {a.lower() for a in args if a.startswith("-")}
+        words = [a for a in args if not a.startswith("-")]
+        trigger_word = words[0] if "-c" in flags else words[0].lower()
     except Exception as e:
         print("Parse error:", e)
-        send_message('Usage: !addtrigger word "response text"')
+        send_message('Usage: !addtrigger [-w] [-c] word "response text"')
         return
 
     data = load_triggers()
 
     if len(data["triggers"]) >= MAX_TRIGGERS:
-        send_message("Trigger limit reached (15 max).")
+        send_message(f"Trigger limit reached ({MAX_TRIGGERS} max).")
         return
 
-    trigger_id = str(data["next_id"])
-    data["next_id"] += 1
-
-    data["triggers"][trigger_id] = {
+    trigger = {
         "word": trigger_word,
         "response": response
     }
+    if "-w" in flags:
+        trigger["whole_word"] = True
+    if "-c" in flags:
+        trigger["case_sensitive"] = True
+
+    trigger_id = get_storage().add_trigger(trigger)
+    invalidate_trigger_matcher()
 
-    save_triggers(data)
     send_message(f"Trigger added: `{trigger_word}` (ID {trigger_id})")
 
-def handle_rmtrigger(msg):
-    text = msg.get("text") or ""
+def handle_rmtrigger(msg, cmd):
     sender_id = str(msg.get("sender_id"))
 
-    if not text.startswith("!rmtrigger"):
-        return
-
     if sender_id not in get_admin_ids():
         send_message("Only admins can remove triggers.")
         return
 
-    parts = text.split()
-    if len(parts) != 2:
+    parts = cmd.args.split()
+    if len(parts) != 1:
         send_message("Usage: !rmtrigger ID")
         return
 
-    trigger_id = parts[1]
-    data = load_triggers()
+    trigger_id = parts[0]
+    trigger = get_storage().remove_trigger(trigger_id)
 
-    if trigger_id not in data["triggers"]:
+    if trigger is None:
         send_message("Trigger ID not found.")
         return
 
-    word = data["triggers"][trigger_id]["word"]
-    del data["triggers"][trigger_id]
-    save_triggers(data)
+    invalidate_trigger_matcher()
 
+    word = trigger["word"]
     send_message(f"Removed trigger `{word}` (ID {trigger_id})")
 
 
@@ -368,13 +1831,19 @@ def get_help_text():
 
         "🎮 -Games- \n"
         "#start — Start Tic Tac Toe\n"
-        "#join — Join Tic Tac Toe\n"
+        "#join [N] — Join Tic Tac Toe (oldest open game, or game N)\n"
         "#A1 / #1A — Tic Tac Toe move\n"
         "#addai - adds a second ai player\n"
 
         "=start — Start Connect Four\n"
-        "=join — Join Connect Four\n"
-        "=A–G — Drop a piece\n\n"
+        "=join [N] — Join Connect Four (oldest open game, or game N)\n"
+        "=addai - adds an ai player\n"
+        "=A–G — Drop a piece\n"
+
+        "$start — Start Checkers\n"
+        "$join [N] — Join Checkers\n"
+        "$addai - adds an ai player\n"
+        "$C3-D4 / $C3xE5xC7 — Checkers move / jumps\n\n"
 
         "🏆 -Leaderboards- \n"
         "!leaderboard — Today's leaders\n"
@@ -385,32 +1854,111 @@ def get_help_text():
         "!admins - Lists admins\n\n"
 
         "🔧 -Admin Only- \n"
-        "!addtrigger word \"response\"\n"
+        "!addtrigger [-w] [-c] word \"response\"\n"
+        "   -w whole word only, -c case sensitive\n"
         "!rmtrigger ID\n"
+        "!stats — Bot performance stats\n"
+        "!profile [seconds] / N msgs / stop — Profile the bot\n"
     )
 
 
-def handle_help_command(msg):
-    text = (msg.get("text") or "").strip().lower()
-    if text == "!help":
-        send_message(get_help_text())
+def handle_help_command(msg, cmd):
+    send_message(get_help_text())
 
 # ---------------------------------------------------------
-# ADMIN / OWNER DETECTION
+# MEMBERSHIP CACHE
 # ---------------------------------------------------------
-def get_admin_ids():
-    group_info = groupme_api(f"groups/{MAIN_GROUP_ID}")
+# Member lists are served from memory. Once they are older than MEMBERSHIP_TTL,
+# or a membership/role change shows up in chat, they are refetched in a
+# background thread and the old list is used until the new one arrives.
+_membership_cache = {}   # group_id -> {"members": [...], "fetched_at": timestamp, "stale": bool}
+_membership_lock = threading.Lock()
+_membership_refreshing = set()
+
+# System message events that mean the member list or roles have changed
+MEMBERSHIP_EVENT_PREFIXES = ("membership.", "group.role")
+
+def fetch_group_members(group_id):
+    group_info = groupme_api(f"groups/{group_id}")
+    if not group_info or not group_info.get("response"):
+        return None
 
-    if not group_info or "response" not in group_info:
-        print("Admin scan failed: no response from API")
-        return set()
+    return group_info["response"].get("members", [])
 
-    members = group_info["response"].get("members", [])
-    admin_ids = set()
+def refresh_group_members(group_id):
+    members = fetch_group_members(group_id)
 
-    print("Admins detected at startup:")
+    with _membership_lock:
+        _membership_refreshing.discard(group_id)
+        if members is not None:
+            _membership_cache[group_id] = {"members": members, "fetched_at": time.time(), "stale": False}
 
-    for m in members:
+    return members
+
+def get_group_members(group_id=None):
+    """
+    Returns the cached member list for a group (MAIN_GROUP_ID by default).
+    Only the very first call for a group waits on the network.
+    """
+    group_id = group_id or MAIN_GROUP_ID
+
+    with _membership_lock:
+        entry = _membership_cache.get(group_id)
+        expired = entry is not None and (entry["stale"] or time.time() - entry["fetched_at"] > MEMBERSHIP_TTL)
+        start_refresh = expired and group_id not in _membership_refreshing
+        if start_refresh:
+            _membership_refreshing.add(group_id)
+
+    if entry is None:
+        return refresh_group_members(group_id)
+
+    if start_refresh:
+        threading.Thread(target=refresh_group_members, args=(group_id,), daemon=True).start()
+
+    return entry["members"]
+
+def invalidate_group_members(group_id=None):
+    group_id = group_id or MAIN_GROUP_ID
+
+    with _membership_lock:
+        entry = _membership_cache.get(group_id)
+        if entry is None:
+            return
+        entry["stale"] = True
+
+    # Start fetching the new list now, so the next admin command doesn't have to
+    get_group_members(group_id)
+
+def handle_membership_event(msg):
+    if not msg.get("system"):
+        return
+
+    event_type = ((msg.get("event") or {}).get("type") or "")
+    if event_type.startswith(MEMBERSHIP_EVENT_PREFIXES):
+        print(f"Membership changed ({event_type}), refreshing member list")
+        invalidate_group_members(MAIN_GROUP_ID)
+
+# ---------------------------------------------------------
+# ADMIN / OWNER DETECTION
+# ---------------------------------------------------------
+def scan_admins_at_startup():
+    # Runs next to the first poll, so it doesn't hold up the start of the loop
+    admins = get_admin_ids()
+    print("Admins detected:", admins)
+    print("TEMP_ADMIN_OVERRIDE:", TEMP_ADMIN_OVERRIDE)
+
+def get_admin_ids():
+    members = get_group_members(MAIN_GROUP_ID)
+
+    if members is None:
+        print("Admin scan failed: no response from API")
+        return set()
+
+    admin_ids = set()
+
+    print("Admins detected at startup:")
+
+    for m in members:
         roles = m.get("roles", [])
         if "admin" in roles or "owner" in roles:
             uid = str(m["user_id"])
@@ -427,11 +1975,10 @@ def get_admin_ids():
 
 #----------------------ADMIN COMMAND-----------------------
 def get_admin_list_text():
-    group_info = groupme_api(f"groups/{MAIN_GROUP_ID}")
-    if not group_info or "response" not in group_info:
+    members = get_group_members(MAIN_GROUP_ID)
+    if members is None:
         return "Could not fetch admin list."
 
-    members = group_info["response"].get("members", [])
     admins = []
 
     for m in members:
@@ -457,233 +2004,222 @@ def get_admin_list_text():
 # TIC TAC TOE
 # ---------------------------------------------------------
 
-# Game state
-ttt_active = False
-ttt_player1_id = None
-ttt_player2_id = None
-ttt_player1_name = None
-ttt_player2_name = None
-ttt_board = None  # dict like {"A1": "+", ...}
-ttt_current_player = None  # "X" or "O"
-ttt_last_activity = None  # timestamp
-ttt_ai_enabled = False
+# Game state lives in GameSession objects; session.board is
+# [x_bits, o_bits]: one 9-bit mask per side, bit i = TTT_CELLS[i]
 TTT_EMPTY = "⚫"   # empty space
 TTT_P1 = "🔵"      # player X
 TTT_P2 = "🔴"      # player O
 TTT_AI = "🟢"      # AI
 
-def ttt_init_board():
-    return {
-        "1A": TTT_EMPTY, "1B": TTT_EMPTY, "1C": TTT_EMPTY,
-        "2A": TTT_EMPTY, "2B": TTT_EMPTY, "2C": TTT_EMPTY,
-        "3A": TTT_EMPTY, "3B": TTT_EMPTY, "3C": TTT_EMPTY
-    }
-
+# Bitboard layout: bit 0 = 1A, bit 1 = 1B, ... bit 8 = 3C
+TTT_CELLS = ["1A", "1B", "1C", "2A", "2B", "2C", "3A", "3B", "3C"]
+TTT_CELL_BITS = {cell: 1 << i for i, cell in enumerate(TTT_CELLS)}
+TTT_FULL = 0b111111111
 
-def ttt_board_to_text():
-    row1 = f"1  {ttt_board['1A']} {ttt_board['1B']} {ttt_board['1C']}"
-    row2 = f"2  {ttt_board['2A']} {ttt_board['2B']} {ttt_board['2C']}"
-    row3 = f"3  {ttt_board['3A']} {ttt_board['3B']} {ttt_board['3C']}"
-    header = "   A B C"
-    return f"{header}\n{row1}\n{row2}\n{row3}"
+TTT_WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,   # rows
+    0b001001001, 0b010010010, 0b100100100,   # columns
+    0b100010001, 0b001010100                 # diagonals
+]
 
+def ttt_init_board():
+    return [0, 0]
 
-def ttt_reset(reason=None):
-    global ttt_active, ttt_player1_id, ttt_player2_id
-    global ttt_player1_name, ttt_player2_name, ttt_board
-    global ttt_current_player, ttt_last_activity
 
-    ttt_active = False
-    ttt_player1_id = None
-    ttt_player2_id = None
-    ttt_player1_name = None
-    ttt_player2_name = None
-    ttt_board = None
-    ttt_current_player = None
-    ttt_last_activity = None
+def ttt_has_line(bits):
+    for mask in TTT_WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
 
-    if reason:
-        send_message(reason)
 
+def ttt_o_piece(session):
+    return TTT_AI if session.ai_enabled else TTT_P2
 
-def ttt_check_inactivity():
-    if not ttt_active or ttt_last_activity is None:
-        return
-    if time.time() - ttt_last_activity > 300:
-        ttt_reset("The Tic Tac Toe game has been reset due to 5 minutes of inactivity.")
 
+def ttt_board_to_text(session):
+    x_bits, o_bits = session.board
+    o_piece = ttt_o_piece(session)
 
-def ttt_check_winner():
-    b = ttt_board
+    cells = [
+        TTT_P1 if x_bits >> i & 1 else o_piece if o_bits >> i & 1 else TTT_EMPTY
+        for i in range(9)
+    ]
 
-    lines = [
-        ("1A", "1B", "1C"),
-        ("2A", "2B", "2C"),
-        ("3A", "3B", "3C"),
+    row1 = f"1  {cells[0]} {cells[1]} {cells[2]}"
+    row2 = f"2  {cells[3]} {cells[4]} {cells[5]}"
+    row3 = f"3  {cells[6]} {cells[7]} {cells[8]}"
+    header = "   A B C"
+    return f"{header}\n{row1}\n{row2}\n{row3}"
 
-        ("1A", "2A", "3A"),
-        ("1B", "2B", "3B"),
-        ("1C", "2C", "3C"),
 
-        ("1A", "2B", "3C"),
-        ("1C", "2B", "3A"),
-    ]
+def ttt_check_winner(session):
+    x_bits, o_bits = session.board
 
-    for a, c, d in lines:
-        if b[a] != TTT_EMPTY and b[a] == b[c] == b[d]:
-            return b[a]
+    if ttt_has_line(x_bits):
+        return TTT_P1
+    if ttt_has_line(o_bits):
+        return ttt_o_piece(session)
 
-    if all(v != TTT_EMPTY for v in b.values()):
+    if x_bits | o_bits == TTT_FULL:
         return "draw"
 
     return None
 
 
-def ttt_handle_start(msg):
-    global ttt_active, ttt_player1_id, ttt_player1_name
-    global ttt_board, ttt_current_player, ttt_last_activity, ttt_ai_enabled
-
+def ttt_handle_start(msg, cmd):
     sender_id = msg.get("sender_id")
     sender_name = msg.get("name") or "Someone"
 
-    if ttt_active:
-        send_message(
-            f"A Tic Tac Toe game is already in progress between "
-            f"{ttt_player1_name} and {ttt_player2_name or 'waiting for Player 2'}."
-        )
+    # Prevent user from playing two games at once
+    if user_is_in_any_game(sender_id):
+        send_message("You are already playing a game. Finish it before starting another.")
         return
 
-    ttt_active = True
-    ttt_ai_enabled = False  # reset AI
-    ttt_player1_id = sender_id
-    ttt_player1_name = sender_name
-    ttt_board = ttt_init_board()
-    ttt_current_player = "X"
-    ttt_last_activity = time.time()
+    session = create_game_session("tictactoe", sender_id, sender_name, ttt_init_board())
 
     send_message(
-        f"{ttt_player1_name} has started a Tic Tac Toe game! Player one, start. "
+        f"{session.player1_name} has started a Tic Tac Toe game (game {session.session_id})! Player one, start. "
         f"Say #join to join, or #addai to play against an AI."
     )
 
-def ttt_handle_join(msg):
-    global ttt_player2_id, ttt_player2_name, ttt_last_activity
-
-    if not ttt_active:
-        return
-
+def ttt_handle_join(msg, cmd):
     sender_id = msg.get("sender_id")
     sender_name = msg.get("name") or "Someone"
 
-    if ttt_player2_id is not None:
-        send_message(
-            f"A Tic Tac Toe game is already going between {ttt_player1_name} and {ttt_player2_name}."
-        )
+    own = get_user_session(sender_id, "tictactoe")
+    if own is not None and own.player2_id is None:
+        send_message("You cannot join your own game — you are already Player 1. Try adding an ai player with #addai.")
         return
 
-    if sender_id == ttt_player1_id:
-        send_message("You cannot join your own game — you are already Player 1. Try adding an ai player with #addai.")
+    # Prevent user from playing two games at once
+    if user_is_in_any_game(sender_id):
+        send_message("You are already playing a game. Finish it before joining another.")
+        return
+
+    # "#join" takes the oldest open game, "#join 3" a specific one
+    wanted = int(cmd.args) if cmd.args.strip().isdigit() else None
+    session = find_open_session("tictactoe", wanted)
+
+    if session is None:
+        if count_game_sessions("tictactoe"):
+            send_message("Every Tic Tac Toe game already has two players. Say #start to start a new one.")
         return
 
-    ttt_player2_id = sender_id
-    ttt_player2_name = sender_name
-    ttt_last_activity = time.time()
+    join_game_session(session, sender_id, sender_name)
 
     send_message(
-        f"{ttt_player2_name} has joined! {ttt_player1_name} is {TTT_P1} and {ttt_player2_name} is {TTT_P2}. "
-        f"{ttt_player1_name} starts."
+        f"{session.player2_name} has joined! {session.player1_name} is {TTT_P1} and {session.player2_name} is {TTT_P2}. "
+        f"{session.player1_name} starts."
     )
-    send_message("Current board:\n" + ttt_board_to_text())
+    send_message("Current board:\n" + ttt_board_to_text(session))
     
-def ttt_handle_add_ai(msg):
-    global ttt_ai_enabled, ttt_player2_id, ttt_player2_name
+def ttt_handle_add_ai(msg, cmd):
+    session = get_user_session(msg.get("sender_id"), "tictactoe")
 
-    if not ttt_active:
+    if session is None:
         send_message("Start a game first with #start.", use_signature=False)
         return
 
-    if ttt_player2_id is not None:
+    if session.player2_id is not None:
         send_message("A second player has already joined.", use_signature=False)
         return
 
-    ttt_ai_enabled = True
-    ttt_player2_id = "AI"
-    ttt_player2_name = "AI"
+    session.ai_enabled = True
+    join_game_session(session, "AI", "AI")
 
     send_message(f"AI has joined as {TTT_AI}. Good luck!", use_signature=False)
 
     # If AI goes first
-    if ttt_current_player == "O":
-        ttt_ai_make_move()
-
-def ttt_ai_make_move():
-    global ttt_board, ttt_current_player, ttt_last_activity
-
-    best_score = -999
-    best_move = None
+    if session.current_player == "O":
+        ttt_ai_make_move(session)
 
-    for move, value in ttt_board.items():
-        if value == TTT_EMPTY:
-            ttt_board[move] = TTT_AI
-            score = ttt_minimax(ttt_board, False)
-            ttt_board[move] = TTT_EMPTY
-            if score > best_score:
-                best_score = score
-                best_move = move
+def ttt_ai_make_move(session):
+    start = time.perf_counter()
+    x_bits, o_bits = session.board
+    best_move = TTT_CELLS[ttt_get_move_table()[(o_bits, x_bits)]]
+    observe("bot_ai_search_duration_seconds", time.perf_counter() - start, game="tictactoe")
 
     # Make the move
-    ttt_board[best_move] = TTT_AI
-    ttt_last_activity = time.time()
+    session.board[1] |= TTT_CELL_BITS[best_move]
+    session.last_activity = time.time()
 
     send_message(
-        f"AI chose {best_move}.\nCurrent board:\n" + ttt_board_to_text(),
+        f"AI chose {best_move}.\nCurrent board:\n" + ttt_board_to_text(session),
         use_signature=False
     )
 
-    result = ttt_check_winner()
+    result = ttt_check_winner(session)
 
     if result == TTT_AI:
         send_message("AI has won the Tic Tac Toe game!", use_signature=False)
-        ttt_reset()
+        end_game_session(session)
         return
 
     if result == "draw":
         send_message("The Tic Tac Toe game is a draw!", use_signature=False)
-        ttt_reset()
+        end_game_session(session)
         return
 
-    ttt_current_player = "X"
-    send_message(f"It is now {ttt_player1_name}'s turn (X).")
+    session.current_player = "X"
+    send_message(f"It is now {session.player1_name}'s turn (X).")
 
-def ttt_minimax(board, is_maximizing):
-    winner = ttt_check_winner()
+# ---------------------------------------------------------
+# Tic Tac Toe perfect-play table
+# ---------------------------------------------------------
+# Every unfinished position reachable from an empty board (4,520 of them) is solved
+# once, the first time the AI moves, and the best move for the side to play is
+# kept in ttt_move_table, so each AI move is a single dict lookup.
+ttt_move_table = None
 
-    if winner == TTT_AI:
-        return 1
-    if winner == TTT_P1:
-        return -1
-    if winner == "draw":
-        return 0
+def ttt_minimax(me, opp, scores, moves):
+    """
+    Negamax over bitboards: me/opp are the masks of the side to move and the other side.
+    Returns the score for the side to move (wins sooner score higher, 0 = draw)
+    and fills scores/moves for every position it visits.
+    """
+    key = (me, opp)
+    if key in scores:
+        return scores[key]
 
-    if is_maximizing:
-        best_score = -999
-        for move, value in board.items():
-            if value == TTT_EMPTY:
-                board[move] = TTT_AI
-                score = ttt_minimax(board, False)
-                board[move] = TTT_EMPTY
-                best_score = max(score, best_score)
-        return best_score
+    empty = ~(me | opp) & TTT_FULL
+    best_score = None
+    best_move = None
 
-    else:
-        best_score = 999
-        for move, value in board.items():
-            if value == TTT_EMPTY:
-                board[move] = TTT_P1
-                score = ttt_minimax(board, True)
-                board[move] = TTT_EMPTY
-                best_score = min(score, best_score)
-        return best_score
+    for i in range(9):
+        bit = 1 << i
+        if not empty & bit:
+            continue
+
+        if ttt_has_line(me | bit):
+            # Winning now: faster wins (more empty squares left) are better
+            score = 1 + bin(empty).count("1")
+        elif empty == bit:
+            score = 0
+        else:
+            score = -ttt_minimax(opp, me | bit, scores, moves)
+
+        if best_score is None or score > best_score:
+            best_score = score
+            best_move = i
+
+    scores[key] = best_score
+    moves[key] = best_move
+    return best_score
+
+def ttt_build_move_table():
+    scores = {}
+    moves = {}
+    ttt_minimax(0, 0, scores, moves)
+    return moves
+
+def ttt_get_move_table():
+    # {(mover_bits, other_bits): cell index of the best move}
+    global ttt_move_table
+
+    if ttt_move_table is None:
+        ttt_move_table = ttt_build_move_table()
+    return ttt_move_table
 
 def ttt_normalize_move(raw):
     """
@@ -709,461 +2245,2257 @@ def ttt_normalize_move(raw):
     return number + letter  # internal format
 
 
-def ttt_handle_move(msg):
-    global ttt_current_player, ttt_last_activity
+def ttt_handle_move(msg, cmd):
+    sender_id = msg.get("sender_id")
+    sender_name = msg.get("name") or "Someone"
 
-    if not ttt_active or ttt_player2_id is None:
+    session = get_user_session(sender_id, "tictactoe")
+    if session is None or session.player2_id is None:
         return
 
-    raw = (msg.get("text") or "").strip().upper()
-    move = ttt_normalize_move(raw)
+    move = ttt_normalize_move(cmd.text.upper())
 
     if move is None:
         return
 
-    valid_moves = {
-        "1A", "1B", "1C",
-        "2A", "2B", "2C",
-        "3A", "3B", "3C"
-    }
-
-    if move not in valid_moves:
+    if move not in TTT_CELL_BITS:
         return
 
-    sender_id = msg.get("sender_id")
-    sender_name = msg.get("name") or "Someone"
-
     # Enforce turn order
-    if ttt_current_player == "X" and sender_id != ttt_player1_id:
-        send_message(f"It is {ttt_player1_name}'s turn {TTT_P1}.")
+    if session.current_player == "X" and sender_id != session.player1_id:
+        send_message(f"It is {session.player1_name}'s turn {TTT_P1}.")
         return
 
-    if ttt_current_player == "O" and not ttt_ai_enabled and sender_id != ttt_player2_id:
-        send_message(f"It is {ttt_player2_name}'s turn {TTT_P2}.")
+    if session.current_player == "O" and not session.ai_enabled and sender_id != session.player2_id:
+        send_message(f"It is {session.player2_name}'s turn {TTT_P2}.")
         return
 
-    if ttt_board[move] != TTT_EMPTY:
+    bit = TTT_CELL_BITS[move]
+    if (session.board[0] | session.board[1]) & bit:
         send_message("That spot is already taken.")
         return
 
     # Human move
-    ttt_board[move] = TTT_P1 if ttt_current_player == "X" else TTT_P2
-    ttt_last_activity = time.time()
+    session.board[0 if session.current_player == "X" else 1] |= bit
+    session.last_activity = time.time()
 
-    send_message(f"{sender_name} played {move}.\nCurrent board:\n" + ttt_board_to_text())
+    send_message(f"{sender_name} played {move}.\nCurrent board:\n" + ttt_board_to_text(session))
 
-    result = ttt_check_winner()
+    result = ttt_check_winner(session)
 
     if result == TTT_P1:
-        add_daily_win("tictactoe", ttt_player1_id, ttt_player1_name)
-        send_message(f"{ttt_player1_name} (🔵) has won the Tic Tac Toe game!")
-        ttt_reset()
+        add_daily_win("tictactoe", session.player1_id, session.player1_name)
+        send_message(f"{session.player1_name} (🔵) has won the Tic Tac Toe game!")
+        end_game_session(session)
         return
 
     if result == TTT_P2 or result == TTT_AI:
-        add_daily_win("tictactoe", ttt_player2_id, ttt_player2_name)
-        winner_name = ttt_player2_name if not ttt_ai_enabled else "AI"
+        add_daily_win("tictactoe", session.player2_id, session.player2_name)
+        winner_name = session.player2_name if not session.ai_enabled else "AI"
         send_message(f"{winner_name} has won the Tic Tac Toe game!")
-        ttt_reset()
+        end_game_session(session)
         return
 
     if result == "draw":
         send_message("The Tic Tac Toe game is a draw!")
-        ttt_reset()
+        end_game_session(session)
         return
 
     # Switch turn
-    ttt_current_player = "O" if ttt_current_player == "X" else "X"
+    session.current_player = "O" if session.current_player == "X" else "X"
 
     # AI turn
-    if ttt_ai_enabled and ttt_current_player == "O":
-        ttt_ai_make_move()
+    if session.ai_enabled and session.current_player == "O":
+        ttt_ai_make_move(session)
         return
 
     # Human turn
-    next_name = ttt_player1_name if ttt_current_player == "X" else ttt_player2_name
-    send_message(f"It is now {next_name}'s turn ({ttt_current_player}).")
-
+    next_name = session.player1_name if session.current_player == "X" else session.player2_name
+    send_message(f"It is now {next_name}'s turn ({session.current_player}).")
 
-def handle_tictactoe(msg):
-    text = (msg.get("text") or "").lower().strip()
-
-    ttt_check_inactivity()
-
-    if text == "#start":
-        ttt_handle_start(msg)
-    elif text == "#join":
-        ttt_handle_join(msg)
-    elif text == "#addai":
-        ttt_handle_add_ai(msg)
-    else:
-        ttt_handle_move(msg)
 
 # ---------------------------------------------------------
 # CONNECT FOUR
 # ---------------------------------------------------------
+# Game state lives in GameSession objects; session.board is the dict built
+# by c4_init_board
 
-# Game state
-c4_active = False
-c4_player1_id = None
-c4_player2_id = None
-c4_player1_name = None
-c4_player2_name = None
-c4_board = None  # list of 7 columns, each column is a list of 6 cells
-c4_current_player = None  # "X" or "O"
-c4_last_activity = None  # timestamp
+# ---------------------------------------------------------
+# Connect Four bitboard engine
+# ---------------------------------------------------------
+# Each side is one integer. Column c uses bits c*7 .. c*7+5 (bottom to top);
+# bit c*7+6 is an always-empty spacer so shifts never wrap into the next column.
+C4_COLS = 7
+C4_ROWS = 6
+C4_COLUMN_BITS = C4_ROWS + 1
+
+C4_BOTTOM = sum(1 << (col * C4_COLUMN_BITS) for col in range(C4_COLS))
+C4_TOP = C4_BOTTOM << (C4_ROWS - 1)
+C4_BOARD_MASK = C4_BOTTOM * ((1 << C4_ROWS) - 1)
+
+# Bit shifts for the four line directions: vertical, horizontal, and the two diagonals
+C4_DIRECTIONS = (1, C4_COLUMN_BITS, C4_COLUMN_BITS + 1, C4_COLUMN_BITS - 1)
+
+def c4_bit(col, row):
+    return 1 << (col * C4_COLUMN_BITS + row)
+
+def c4_build_line_masks():
+    # For every cell and direction: the cells up to 3 steps away along that line
+    steps = {1: (0, 1), C4_COLUMN_BITS: (1, 0), C4_COLUMN_BITS + 1: (1, 1), C4_COLUMN_BITS - 1: (1, -1)}
+    masks = {}
+
+    for col in range(C4_COLS):
+        for row in range(C4_ROWS):
+            lines = []
+            for shift in C4_DIRECTIONS:
+                dc, dr = steps[shift]
+                line = 0
+                for k in range(-3, 4):
+                    c, r = col + k * dc, row + k * dr
+                    if 0 <= c < C4_COLS and 0 <= r < C4_ROWS:
+                        line |= c4_bit(c, r)
+                lines.append(line)
+            masks[col * C4_COLUMN_BITS + row] = tuple(zip(C4_DIRECTIONS, lines))
+
+    return masks
+
+C4_LINE_MASKS = c4_build_line_masks()
+
+def c4_wins_through(bits, pos):
+    # Shift-and over only the four lines through bit `pos` (the last piece placed)
+    for shift, line_mask in C4_LINE_MASKS[pos]:
+        line = bits & line_mask
+        pairs = line & (line >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
 
 def c4_init_board():
-    # 7 columns, each with 6 rows
-    return [["+" for _ in range(6)] for _ in range(7)]
+    return {
+        "X": 0,
+        "O": 0,
+        # Bit index of the next free cell in each column
+        "heights": [col * C4_COLUMN_BITS for col in range(C4_COLS)],
+        "last": None
+    }
 
-def c4_board_to_text():
+def c4_board_to_text(board):
     # Box-drawing style
     header = "    A   B   C   D   E   F   G"
     rows = []
+    x_bits, o_bits = board["X"], board["O"]
 
     for row in range(5, -1, -1):  # 6 → 1
         line = f"{row+1} "
         for col in range(7):
-            line += f"| {c4_board[col][row]} "
+            bit = c4_bit(col, row)
+            piece = "X" if x_bits & bit else "O" if o_bits & bit else "+"
+            line += f"| {piece} "
         line += "|"
         rows.append(line)
 
     return header + "\n" + "\n".join(rows)
 
-def c4_reset(reason=None):
-    global c4_active, c4_player1_id, c4_player2_id
-    global c4_player1_name, c4_player2_name
-    global c4_board, c4_current_player, c4_last_activity
-
-    c4_active = False
-    c4_player1_id = None
-    c4_player2_id = None
-    c4_player1_name = None
-    c4_player2_name = None
-    c4_board = None
-    c4_current_player = None
-    c4_last_activity = None
-
-    if reason:
-        send_message(reason)
+def c4_handle_start(msg, cmd):
+    sender_id = msg.get("sender_id")
+    sender_name = msg.get("name") or "Someone"
 
-def c4_check_inactivity():
-    if not c4_active or c4_last_activity is None:
+    # Prevent user from playing two games at once
+    if user_is_in_any_game(sender_id):
+        send_message("You are already playing a game. Finish it before starting another.")
         return
-    if time.time() - c4_last_activity > 300:
-        c4_reset("The Connect Four game has been reset due to 5 minutes of inactivity.")
 
-def c4_handle_start(msg):
-    global c4_active, c4_player1_id, c4_player1_name
-    global c4_board, c4_current_player, c4_last_activity
+    session = create_game_session("connectfour", sender_id, sender_name, c4_init_board())
+
+    send_message(
+        f"{session.player1_name} has started a Connect Four game (game {session.session_id})! "
+        f"Say =join to join as Player 2, or =addai to play against an AI."
+    )
 
+def c4_handle_join(msg, cmd):
     sender_id = msg.get("sender_id")
     sender_name = msg.get("name") or "Someone"
 
-    if c4_active:
-        send_message(
-            f"A Connect Four game is already in progress between "
-            f"{c4_player1_name} and {c4_player2_name or 'waiting for Player 2'}."
-        )
+    own = get_user_session(sender_id, "connectfour")
+    if own is not None and own.player2_id is None:
+        send_message("You cannot join your own game — you are already Player 1.")
         return
 
     # Prevent user from playing two games at once
     if user_is_in_any_game(sender_id):
-        send_message("You are already playing a game. Finish it before starting another.")
+        send_message("You are already playing a game. Finish it before joining another.")
         return
 
-    c4_active = True
-    c4_player1_id = sender_id
-    c4_player1_name = sender_name
-    c4_board = c4_init_board()
-    c4_current_player = "X"
-    c4_last_activity = time.time()
+    # "=join" takes the oldest open game, "=join 3" a specific one
+    wanted = int(cmd.args) if cmd.args.strip().isdigit() else None
+    session = find_open_session("connectfour", wanted)
+
+    if session is None:
+        if count_game_sessions("connectfour"):
+            send_message("Every Connect Four game already has two players. Say =start to start a new one.")
+        return
+
+    join_game_session(session, sender_id, sender_name)
 
     send_message(
-        f"{c4_player1_name} has started a Connect Four game! "
-        f"Say =join to join as Player 2."
+        f"{session.player2_name} has joined! {session.player1_name} is X and {session.player2_name} is O. "
+        f"{session.player1_name} starts."
     )
+    send_message("Current board:\n" + c4_board_to_text(session.board))
 
-def c4_handle_join(msg):
-    global c4_player2_id, c4_player2_name, c4_last_activity
+def c4_handle_add_ai(msg, cmd):
+    session = get_user_session(msg.get("sender_id"), "connectfour")
 
-    if not c4_active:
+    if session is None:
+        send_message("Start a game first with =start.", use_signature=False)
         return
 
-    sender_id = msg.get("sender_id")
-    sender_name = msg.get("name") or "Someone"
-
-    if c4_player2_id is not None:
-        send_message(
-            f"A Connect Four game is already going between {c4_player1_name} and {c4_player2_name}."
-        )
+    if session.player2_id is not None:
+        send_message("A second player has already joined.", use_signature=False)
         return
 
-    if sender_id == c4_player1_id:
-        send_message("You cannot join your own game — you are already Player 1.")
-        return
+    session.ai_enabled = True
+    join_game_session(session, "AI", "AI")
 
-    # Prevent user from playing two games at once
-    if user_is_in_any_game(sender_id):
-        send_message("You are already playing a game. Finish it before joining another.")
-        return
+    send_message(
+        f"AI has joined as O. {session.player1_name} is X and starts.\nCurrent board:\n" + c4_board_to_text(session.board),
+        use_signature=False
+    )
+
+    # If AI goes first
+    if session.current_player == "O":
+        c4_ai_make_move(session)
+
+def c4_ai_make_move(session):
+    board = session.board
+    cur = board["O"]
+    mask = board["X"] | board["O"]
+    col_index, stats = c4_search(cur, mask)
+    observe("bot_ai_search_duration_seconds", stats["seconds"], game="connectfour")
+    print(
+        f"[C4 AI] column {'ABCDEFG'[col_index]}: {stats['nodes']} nodes, "
+        f"depth {stats['depth']}, {stats['seconds']:.2f}s"
+    )
 
-    c4_player2_id = sender_id
-    c4_player2_name = sender_name
-    c4_last_activity = time.time()
+    c4_drop_piece(board, col_index, "O")
+    session.last_activity = time.time()
 
     send_message(
-        f"{c4_player2_name} has joined! {c4_player1_name} is X and {c4_player2_name} is O. "
-        f"{c4_player1_name} starts."
+        f"AI played in column {'ABCDEFG'[col_index]} "
+        f"(searched {stats['nodes']:,} positions, {stats['depth']} moves ahead).\n"
+        f"Current board:\n" + c4_board_to_text(board),
+        use_signature=False
     )
-    send_message("Current board:\n" + c4_board_to_text())
-
-def c4_drop_piece(col_index, piece):
-    column = c4_board[col_index]
-    for i in range(6):
-        if column[i] == "+":
-            column[i] = piece
-            return i
-    return None  # column full
-
-def c4_check_winner():
-    b = c4_board
-
-    # Horizontal
-    for row in range(6):
-        for col in range(4):
-            line = [b[col+i][row] for i in range(4)]
-            if line[0] != "+" and all(x == line[0] for x in line):
-                return line[0]
 
-    # Vertical
-    for col in range(7):
-        for row in range(3):
-            line = [b[col][row+i] for i in range(4)]
-            if line[0] != "+" and all(x == line[0] for x in line):
-                return line[0]
-
-    # Diagonal /
-    for col in range(4):
-        for row in range(3):
-            line = [b[col+i][row+i] for i in range(4)]
-            if line[0] != "+" and all(x == line[0] for x in line):
-                return line[0]
-
-    # Diagonal \
-    for col in range(4):
-        for row in range(3, 6):
-            line = [b[col+i][row-i] for i in range(4)]
-            if line[0] != "+" and all(x == line[0] for x in line):
-                return line[0]
+    result = c4_check_winner(board)
+
+    if result == "O":
+        send_message("AI has won the Connect Four game!", use_signature=False)
+        end_game_session(session)
+        return
+
+    if result == "draw":
+        send_message("The Connect Four game is a draw!", use_signature=False)
+        end_game_session(session)
+        return
+
+    session.current_player = "X"
+    send_message(f"It is now {session.player1_name}'s turn (X).")
+
+def c4_drop_piece(board, col_index, piece):
+    pos = board["heights"][col_index]
+    row = pos - col_index * C4_COLUMN_BITS
+    if row >= C4_ROWS:
+        return None  # column full
+
+    board[piece] |= 1 << pos
+    board["heights"][col_index] += 1
+    board["last"] = pos
+    return row
+
+def c4_check_winner(board):
+    # Any new four has to go through the piece that was just dropped
+    pos = board["last"]
+    if pos is None:
+        return None
+
+    for piece in ("X", "O"):
+        if (board[piece] >> pos) & 1 and c4_wins_through(board[piece], pos):
+            return piece
 
     # Draw
-    if all(b[col][5] != "+" for col in range(7)):
+    if (board["X"] | board["O"]) & C4_TOP == C4_TOP:
         return "draw"
 
     return None
 
-def c4_handle_move(msg):
-    global c4_current_player, c4_last_activity
+# ---------------------------------------------------------
+# Connect Four AI: negamax with alpha-beta pruning
+# ---------------------------------------------------------
+# Positions are (cur, mask): the pieces of the side to move and all pieces.
+# The search deepens one ply at a time until C4_AI_TIME_BUDGET runs out and
+# plays the best move from the deepest search that finished.
+C4_AI_TIME_BUDGET = 1.5        # seconds per AI move, so polling is never held up for long
+C4_AI_MAX_DEPTH = 42
+C4_TT_MAX_ENTRIES = 200000     # the transposition table is cleared when it grows past this
+C4_MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)   # center columns first
+C4_WIN_SCORE = 1000
 
-    if not c4_active or c4_player2_id is None:
-        return
+C4_CENTER = C4_BOARD_MASK & (((1 << C4_ROWS) - 1) << (3 * C4_COLUMN_BITS))
+C4_COLUMN_MASKS = [((1 << C4_ROWS) - 1) << (col * C4_COLUMN_BITS) for col in range(C4_COLS)]
 
-    text = (msg.get("text") or "").strip().upper()
-    if not text.startswith("="):
-        return
+popcount = int.bit_count if hasattr(int, "bit_count") else (lambda x: bin(x).count("1"))
 
-    move = text[1:]
-    if move not in "ABCDEFG":
-        return
+c4_transposition_table = {}
 
-    col_index = "ABCDEFG".index(move)
+class C4SearchTimeout(Exception):
+    pass
+
+def c4_winning_cells(cur, mask):
+    """
+    Empty cells where `cur` would complete a four (whether or not they can be played yet).
+    """
+    h = C4_COLUMN_BITS
+
+    # Vertical
+    r = (cur << 1) & (cur << 2) & (cur << 3)
+
+    # Horizontal and the two diagonals
+    for shift in (h, h - 1, h + 1):
+        p = (cur << shift) & (cur << 2 * shift)
+        r |= p & (cur << 3 * shift)
+        r |= p & (cur >> shift)
+        p = (cur >> shift) & (cur >> 2 * shift)
+        r |= p & (cur << shift)
+        r |= p & (cur >> 3 * shift)
+
+    return r & (C4_BOARD_MASK ^ mask)
+
+def c4_evaluate(cur, mask):
+    # Open threats are worth the most, then pieces in the center column
+    opp = cur ^ mask
+    threats = popcount(c4_winning_cells(cur, mask)) - popcount(c4_winning_cells(opp, mask))
+    center = popcount(cur & C4_CENTER) - popcount(opp & C4_CENTER)
+    return 4 * threats + center
+
+def c4_negamax(cur, mask, depth, alpha, beta, stats):
+    stats["nodes"] += 1
+    if stats["nodes"] & 1023 == 0 and time.perf_counter() > stats["deadline"]:
+        raise C4SearchTimeout()
+
+    playable = (mask + C4_BOTTOM) & C4_BOARD_MASK
+    moves_played = popcount(mask)
+
+    # Win on this move
+    if c4_winning_cells(cur, mask) & playable:
+        return C4_WIN_SCORE - moves_played
+
+    if playable == 0:
+        return 0
+
+    if depth == 0:
+        return c4_evaluate(cur, mask)
+
+    key = cur + mask   # unique for every position
+    entry = c4_transposition_table.get(key)
+    best_col = None
+    if entry is not None:
+        entry_depth, entry_score, entry_flag, best_col = entry
+        if entry_depth >= depth:
+            if entry_flag == 0:
+                return entry_score
+            if entry_flag < 0 and entry_score <= alpha:
+                return entry_score
+            if entry_flag > 0 and entry_score >= beta:
+                return entry_score
+
+    original_alpha = alpha
+    best_score = -C4_WIN_SCORE - 1
+    order = C4_MOVE_ORDER if best_col is None else (best_col,) + tuple(c for c in C4_MOVE_ORDER if c != best_col)
+
+    for col in order:
+        move = playable & C4_COLUMN_MASKS[col]
+        if not move:
+            continue
+
+        score = -c4_negamax(cur ^ mask, mask | move, depth - 1, -beta, -alpha, stats)
+        if score > best_score:
+            best_score = score
+            best_col = col
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            break
 
+    # flag: 0 exact, -1 upper bound (failed low), 1 lower bound (failed high)
+    flag = -1 if best_score <= original_alpha else 1 if best_score >= beta else 0
+    if len(c4_transposition_table) >= C4_TT_MAX_ENTRIES:
+        c4_transposition_table.clear()
+    c4_transposition_table[key] = (depth, best_score, flag, best_col)
+
+    return best_score
+
+def c4_search(cur, mask, time_budget=None, max_depth=None):
+    """
+    Iterative deepening search for the side to move.
+    Returns (column, stats) where stats has nodes, depth (deepest finished search),
+    score and seconds.
+    """
+    start = time.perf_counter()
+    budget = C4_AI_TIME_BUDGET if time_budget is None else time_budget
+    max_depth = max_depth or C4_AI_MAX_DEPTH
+    stats = {"nodes": 0, "depth": 0, "score": 0, "deadline": start + budget}
+
+    playable = (mask + C4_BOTTOM) & C4_BOARD_MASK
+    legal = [col for col in C4_MOVE_ORDER if playable & C4_COLUMN_MASKS[col]]
+    best_col = legal[0]
+
+    # Take a win right away
+    winning = c4_winning_cells(cur, mask) & playable
+    if winning:
+        best_col = next(col for col in legal if winning & C4_COLUMN_MASKS[col])
+        stats["depth"] = 1
+        stats["score"] = C4_WIN_SCORE
+        stats["seconds"] = time.perf_counter() - start
+        del stats["deadline"]
+        return best_col, stats
+
+    for depth in range(1, min(max_depth, C4_ROWS * C4_COLS - popcount(mask)) + 1):
+        order = [best_col] + [col for col in legal if col != best_col]
+        alpha = -C4_WIN_SCORE - 1
+        depth_best = best_col
+
+        try:
+            for col in order:
+                move = playable & C4_COLUMN_MASKS[col]
+                score = -c4_negamax(cur ^ mask, mask | move, depth - 1, -C4_WIN_SCORE - 1, -alpha, stats)
+                if score > alpha:
+                    alpha = score
+                    depth_best = col
+        except C4SearchTimeout:
+            break
+
+        best_col = depth_best
+        stats["depth"] = depth
+        stats["score"] = alpha
+
+        # A forced result was found, searching deeper won't change it
+        if abs(alpha) > C4_WIN_SCORE - C4_ROWS * C4_COLS:
+            break
+
+    stats["seconds"] = time.perf_counter() - start
+    del stats["deadline"]
+    return best_col, stats
+
+def c4_handle_move(msg, cmd):
     sender_id = msg.get("sender_id")
     sender_name = msg.get("name") or "Someone"
 
+    session = get_user_session(sender_id, "connectfour")
+    if session is None or session.player2_id is None:
+        return
+
+    move = cmd.verb.upper()
+    if cmd.args:
+        return
+
+    col_index = "ABCDEFG".index(move)
+
     # Turn enforcement
-    if c4_current_player == "X" and sender_id != c4_player1_id:
-        send_message(f"It is {c4_player1_name}'s turn (X).")
+    if session.current_player == "X" and sender_id != session.player1_id:
+        send_message(f"It is {session.player1_name}'s turn (X).")
         return
-    if c4_current_player == "O" and sender_id != c4_player2_id:
-        send_message(f"It is {c4_player2_name}'s turn (O).")
+    if session.current_player == "O" and sender_id != session.player2_id:
+        send_message(f"It is {session.player2_name}'s turn (O).")
         return
 
-    row = c4_drop_piece(col_index, c4_current_player)
+    board = session.board
+    row = c4_drop_piece(board, col_index, session.current_player)
     if row is None:
         send_message("That column is full.")
         return
 
-    c4_last_activity = time.time()
+    session.last_activity = time.time()
 
     send_message(
-        f"{sender_name} played in column {move}.\nCurrent board:\n" + c4_board_to_text()
+        f"{sender_name} played in column {move}.\nCurrent board:\n" + c4_board_to_text(board)
     )
 
-    result = c4_check_winner()
+    result = c4_check_winner(board)
 
     if result == "X":
-        add_daily_win("connectfour", c4_player1_id, c4_player1_name)
-        send_message(f"{c4_player1_name} (X) has won the Connect Four game!")
-        c4_reset()
+        add_daily_win("connectfour", session.player1_id, session.player1_name)
+        send_message(f"{session.player1_name} (X) has won the Connect Four game!")
+        end_game_session(session)
         return
 
     elif result == "O":
-        add_daily_win("connectfour", c4_player2_id, c4_player2_name)
-        send_message(f"{c4_player2_name} (O) has won the Connect Four game!")
-        c4_reset()
+        add_daily_win("connectfour", session.player2_id, session.player2_name)
+        send_message(f"{session.player2_name} (O) has won the Connect Four game!")
+        end_game_session(session)
         return
 
     elif result == "draw":
         send_message("The Connect Four game is a draw!")
-        c4_reset()
+        end_game_session(session)
         return
 
-    c4_current_player = "O" if c4_current_player == "X" else "X"
-    next_name = c4_player1_name if c4_current_player == "X" else c4_player2_name
-    send_message(f"It is now {next_name}'s turn ({c4_current_player}).")
+    session.current_player = "O" if session.current_player == "X" else "X"
 
-def handle_connect_four(msg):
-    text = (msg.get("text") or "").lower().strip()
-
-    c4_check_inactivity()
+    # AI turn
+    if session.ai_enabled and session.current_player == "O":
+        c4_ai_make_move(session)
+        return
 
-    if text == "=start":
-        c4_handle_start(msg)
-    elif text == "=join":
-        c4_handle_join(msg)
-    else:
-        c4_handle_move(msg)
+    next_name = session.player1_name if session.current_player == "X" else session.player2_name
+    send_message(f"It is now {next_name}'s turn ({session.current_player}).")
 
 # ---------------------------------------------------------
-# Function: check if a message triggers the bot (counter)
+# CHECKERS
 # ---------------------------------------------------------
-def handle_triggers(msg):
-    text = (msg.get("text") or "").lower()
-    if not text:
-        return
 
-    # Ignore bot-generated messages
-    if text.endswith(BOT_SIGNATURE.strip().lower()):
-        return
+# Game state lives in GameSession objects; session.board is the dict built by
+# ck_init_board. X starts at the bottom (rows 1-3) and moves first.
+CK_LIGHT = "⬜"     # unplayable square
+CK_EMPTY = "⬛"     # empty dark square
+CK_PIECES = {
+    ("X", False): "🔴", ("X", True): "🟥",   # player X man / king
+    ("O", False): "🔵", ("O", True): "🟦"    # player O man / king
+}
 
-    data = load_triggers()
+# A game is drawn after this many plies in a row with only kings moving and nothing captured
+CK_DRAW_PLIES = 80
 
-    for t in data["triggers"].values():
-        if t["word"] in text:
-            send_message(t["response"], use_signature=True)
-            return
+# ---------------------------------------------------------
+# Checkers bitboard engine
+# ---------------------------------------------------------
+# The 32 dark squares are bits 0..31, four per row from the bottom: bit 0 = A1,
+# bit 3 = G1, bit 4 = B2, ... bit 31 = H8. One diagonal step is a shift by 3, 4
+# or 5 depending on the row, so each direction is two masked shifts and whole
+# sets of pieces are moved, or tested for moves, at once.
+CK_FULL = 0xFFFFFFFF
+CK_COLUMNS = "ABCDEFGH"
+
+CK_COORDS = [(2 * (sq % 4) + (sq // 4) % 2, sq // 4) for sq in range(32)]   # bit -> (col, row)
+CK_INDEX = {coord: sq for sq, coord in enumerate(CK_COORDS)}
+CK_SQUARE_NAMES = [f"{CK_COLUMNS[col]}{row + 1}" for col, row in CK_COORDS]
+CK_SQUARE_INDEX = {name: sq for sq, name in enumerate(CK_SQUARE_NAMES)}
+
+CK_DIRECTION_STEPS = {"UL": (-1, 1), "UR": (1, 1), "DL": (-1, -1), "DR": (1, -1)}
+CK_OPPOSITE = {"UL": "DR", "UR": "DL", "DL": "UR", "DR": "UL"}
+CK_FORWARD = {"X": ("UL", "UR"), "O": ("DL", "DR")}   # directions men may move in
+CK_PROMOTION = {"X": 0xF0000000, "O": 0x0000000F}     # back rows where men are crowned
+
+def ck_build_directions():
+    # For each direction: (mask, shift) pairs, one per shift size that direction uses
+    directions = {}
+
+    for name, (dc, dr) in CK_DIRECTION_STEPS.items():
+        masks = {}
+        for sq, (col, row) in enumerate(CK_COORDS):
+            target = CK_INDEX.get((col + dc, row + dr))
+            if target is not None:
+                masks[target - sq] = masks.get(target - sq, 0) | 1 << sq
+        directions[name] = tuple((mask, shift) for shift, mask in masks.items())
+
+    return directions
+
+CK_DIRECTIONS = ck_build_directions()
+
+# Square jumped over when going from one square to another two steps away
+CK_BETWEEN = {
+    (sq, CK_INDEX[(col + 2 * dc, row + 2 * dr)]): CK_INDEX[(col + dc, row + dr)]
+    for sq, (col, row) in enumerate(CK_COORDS)
+    for dc, dr in CK_DIRECTION_STEPS.values()
+    if (col + 2 * dc, row + 2 * dr) in CK_INDEX
+}
 
-def handle_listtriggers(msg):
-    text = msg.get("text") or ""
-    if text != "!listtriggers":
-        return
+def ck_step(bits, direction):
+    # Moves every piece in `bits` one square in `direction`; pieces that would leave the board vanish
+    out = 0
+    for mask, shift in CK_DIRECTIONS[direction]:
+        moved = bits & mask
+        out |= moved << shift if shift > 0 else moved >> -shift
+    return out
 
-    data = load_triggers()
-    triggers = data.get("triggers", {})
+def ck_other(side):
+    return "O" if side == "X" else "X"
 
-    if not triggers:
-        send_message("No triggers are currently set.")
-        return
+def ck_init_board():
+    return {
+        "X": 0x00000FFF,   # rows 1-3
+        "O": 0xFFF00000,   # rows 6-8
+        "K": 0,            # kings of either side
+        "quiet": 0         # plies since the last capture or man move
+    }
 
-    lines = ["Triggers:"]
-    for tid, info in triggers.items():
-        lines.append(f"{tid}: {info['word']}")
+def ck_piece_directions(board, side):
+    # (direction, pieces that may move that way): men only forward, kings every way
+    kings = board[side] & board["K"]
+    for direction in CK_DIRECTION_STEPS:
+        yield direction, board[side] if direction in CK_FORWARD[side] else kings
 
-    send_message("\n".join(lines))
+def ck_jumpers(board, side):
+    # Every piece of `side` that can capture, found for all pieces at once
+    opponent = board[ck_other(side)]
+    empty = CK_FULL & ~(board["X"] | board["O"])
+    found = 0
 
+    for direction, pieces in ck_piece_directions(board, side):
+        landing = ck_step(ck_step(pieces, direction) & opponent, direction) & empty
+        back = CK_OPPOSITE[direction]
+        found |= ck_step(ck_step(landing, back), back)
 
-# ---------------------------------------------------------
-# Polling loop: watch for mentions, triggers, join events, and games
-# ---------------------------------------------------------
-def watch_for_mentions():
-    print("Watching for mentions, trigger words, Tic Tac Toe, Connect Four, and join events...")
+    return found
 
-    data = groupme_api(f"groups/{GROUP_ID}/messages")
-    if data is None:
-        print("[ERROR] Could not fetch initial messages.")
-        time.sleep(2)
-        return
+def ck_movers(board, side):
+    # Every piece of `side` with a plain (non-capturing) move
+    empty = CK_FULL & ~(board["X"] | board["O"])
+    found = 0
 
-    last_seen_id = data["response"]["messages"][0]["id"]
+    for direction, pieces in ck_piece_directions(board, side):
+        found |= ck_step(ck_step(pieces, direction) & empty, CK_OPPOSITE[direction])
 
-    while True:
-        time.sleep(2)
+    return found
 
-        # 🔥 DAILY RESET (also awards monthly points)
-        reset_daily_leaderboard_if_needed()
+def ck_has_moves(board, side):
+    # A fixed number of shifts and masks, however many pieces are on the board
+    return bool(ck_movers(board, side) or ck_jumpers(board, side))
 
-        data = groupme_api(f"groups/{GROUP_ID}/messages")
-        if data is None:
-            print("[WARN] No data returned, retrying...")
-            time.sleep(2)
+def ck_jump_chains(board, side, sq, is_king, path, out):
+    # Follows every capture sequence for the piece on `sq`; complete paths go into `out`
+    opponent = board[ck_other(side)]
+    empty = CK_FULL & ~(board["X"] | board["O"])
+    bit = 1 << sq
+    extended = False
+
+    for direction in CK_DIRECTION_STEPS:
+        if not is_king and direction not in CK_FORWARD[side]:
             continue
 
-        messages = data["response"]["messages"]
-        new_last_seen = last_seen_id
+        jumped = ck_step(bit, direction) & opponent
+        landing = ck_step(jumped, direction) & empty
+        if not landing:
+            continue
 
-        for msg in messages:
-            msg_id = msg["id"]
-
-            # Stop when we reach messages we've already processed
-            if msg_id == last_seen_id:
-                break
-
-            text = (msg.get("text") or "").lower().strip()
-
-            # -------------------------------
-            # GAME HANDLERS
-            # -------------------------------
-            handle_tictactoe(msg)
-            handle_connect_four(msg)
-
-            # -------------------------------
-            # HELP COMMAND
-            # -------------------------------
-            handle_help_command(msg)
-            
-            # -------------------------------
-            # TRIGGERS
-            # -------------------------------
-            handle_triggers(msg)
-            handle_addtrigger(msg)
-            handle_listtriggers(msg)
-            handle_rmtrigger(msg)
-
-            # -------------------------------
-            # MONTHLY LEADERBOARD COMMAND
-            # -------------------------------
-            if text == "!monthlyleaders":
-                send_message(get_monthly_text())
-
-            # -------------------------------
-            # ADMIN LIST COMMAND
-            # -------------------------------
-            if text == "!admins":
-                send_message(get_admin_list_text(), use_signature=False)
-
-            # -------------------------------
-            # DAILY LEADERBOARD COMMAND
-            # -------------------------------
-            if text == "!leaderboard":
-                send_message(get_daily_leaderboard_text())
-
-            # Track newest message
-            if new_last_seen == last_seen_id:
-                new_last_seen = msg_id
-
-        last_seen_id = new_last_seen
-        
-# ---------------------------------------------------------
-# Start the bot
-# ---------------------------------------------------------
-# Force an admin scan at startup
-print("Scanning for admins at startup...")
-admins = get_admin_ids()
-print("Admins detected:", admins)
-print("TEMP_ADMIN_OVERRIDE:", TEMP_ADMIN_OVERRIDE)
+        extended = True
+        target = landing.bit_length() - 1
+        after = dict(board)
+        after[side] = board[side] & ~bit | landing
+        after[ck_other(side)] = opponent & ~jumped
 
-# Start the bot
-watch_for_mentions()
\ No newline at end of file
+        # A man that reaches the back row is crowned and his move ends there
+        if not is_king and landing & CK_PROMOTION[side]:
+            out.append(path + [target])
+        else:
+            ck_jump_chains(after, side, target, is_king, path + [target], out)
+
+    if not extended and len(path) > 1:
+        out.append(path)
+
+def ck_generate_moves(board, side):
+    """
+    Returns every legal move for `side` as a list of squares visited, e.g.
+    [9, 18, 27] for a double jump. Captures are mandatory, so when one exists
+    only capture sequences are returned.
+    """
+    jumpers = ck_jumpers(board, side)
+    if jumpers:
+        moves = []
+        while jumpers:
+            bit = jumpers & -jumpers
+            jumpers ^= bit
+            sq = bit.bit_length() - 1
+            ck_jump_chains(board, side, sq, bool(board["K"] & bit), [sq], moves)
+        return moves
+
+    empty = CK_FULL & ~(board["X"] | board["O"])
+    moves = []
+
+    for direction, pieces in ck_piece_directions(board, side):
+        targets = ck_step(pieces, direction) & empty
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            start = ck_step(bit, CK_OPPOSITE[direction])
+            moves.append([start.bit_length() - 1, bit.bit_length() - 1])
+
+    return moves
+
+def ck_is_capture(move):
+    return (move[0], move[1]) in CK_BETWEEN
+
+def ck_apply_move(board, side, move):
+    # Returns a new board with `move` (as from ck_generate_moves) played
+    other = ck_other(side)
+    start, end = 1 << move[0], 1 << move[-1]
+    was_king = board["K"] & start
+
+    captured = 0
+    for a, b in zip(move, move[1:]):
+        if (a, b) in CK_BETWEEN:
+            captured |= 1 << CK_BETWEEN[(a, b)]
+
+    kings = board["K"] & ~start & ~captured
+    if was_king or end & CK_PROMOTION[side]:
+        kings |= end
+
+    return {
+        side: board[side] & ~start | end,
+        other: board[other] & ~captured,
+        "K": kings,
+        "quiet": board["quiet"] + 1 if was_king and not captured else 0
+    }
+
+def ck_draw_text():
+    moves = CK_DRAW_PLIES // 2
+    return f"The Checkers game is a draw ({moves} move{'' if moves == 1 else 's'} each without a capture or a man moving)."
+
+def ck_check_winner(board, to_move):
+    # Called after a move with the side that moves next
+    if not ck_has_moves(board, to_move):
+        return ck_other(to_move)   # no pieces left, or every piece is blocked
+
+    if board["quiet"] >= CK_DRAW_PLIES:
+        return "draw"
+
+    return None
+
+def ck_move_to_text(move):
+    separator = "x" if ck_is_capture(move) else "-"
+    return separator.join(CK_SQUARE_NAMES[sq] for sq in move)
+
+def ck_parse_move(text):
+    # "c3-d4", "c3xe5xc7", "c3 d4" -> [9, 13]; None if it isn't a move
+    squares = re.findall(r"[A-H][1-8]", text.upper())
+    if len(squares) < 2 or any(sq not in CK_SQUARE_INDEX for sq in squares):
+        return None
+    return [CK_SQUARE_INDEX[sq] for sq in squares]
+
+def ck_find_move(moves, squares):
+    # The exact path, or just start and end square if only one capture sequence fits
+    if squares in moves:
+        return squares
+
+    if len(squares) == 2:
+        matches = [m for m in moves if m[0] == squares[0] and m[-1] == squares[1]]
+        if len(matches) == 1:
+            return matches[0]
+
+    return None
+
+def ck_board_to_text(board):
+    header = "   A B C D E F G H"
+    rows = []
+
+    for row in range(7, -1, -1):   # 8 → 1
+        cells = []
+        for col in range(8):
+            sq = CK_INDEX.get((col, row))
+            if sq is None:
+                cells.append(CK_LIGHT)
+                continue
+
+            bit = 1 << sq
+            side = "X" if board["X"] & bit else "O" if board["O"] & bit else None
+            cells.append(CK_PIECES[(side, bool(board["K"] & bit))] if side else CK_EMPTY)
+        rows.append(f"{row + 1}  " + " ".join(cells))
+
+    return header + "\n" + "\n".join(rows)
+
+def ck_handle_start(msg, cmd):
+    sender_id = msg.get("sender_id")
+    sender_name = msg.get("name") or "Someone"
+
+    # Prevent user from playing two games at once
+    if user_is_in_any_game(sender_id):
+        send_message("You are already playing a game. Finish it before starting another.")
+        return
+
+    session = create_game_session("checkers", sender_id, sender_name, ck_init_board())
+
+    send_message(
+        f"{session.player1_name} has started a Checkers game (game {session.session_id})! "
+        f"Say $join to join as Player 2, or $addai to play against an AI."
+    )
+
+def ck_handle_join(msg, cmd):
+    sender_id = msg.get("sender_id")
+    sender_name = msg.get("name") or "Someone"
+
+    own = get_user_session(sender_id, "checkers")
+    if own is not None and own.player2_id is None:
+        send_message("You cannot join your own game — you are already Player 1.")
+        return
+
+    # Prevent user from playing two games at once
+    if user_is_in_any_game(sender_id):
+        send_message("You are already playing a game. Finish it before joining another.")
+        return
+
+    # "$join" takes the oldest open game, "$join 3" a specific one
+    wanted = int(cmd.args) if cmd.args.strip().isdigit() else None
+    session = find_open_session("checkers", wanted)
+
+    if session is None:
+        if count_game_sessions("checkers"):
+            send_message("Every Checkers game already has two players. Say $start to start a new one.")
+        return
+
+    join_game_session(session, sender_id, sender_name)
+
+    send_message(
+        f"{session.player2_name} has joined! {session.player1_name} is {CK_PIECES[('X', False)]} and "
+        f"{session.player2_name} is {CK_PIECES[('O', False)]}. {session.player1_name} starts. "
+        f"Move with $C3-D4, or $C3xE5xC7 for jumps."
+    )
+    send_message("Current board:\n" + ck_board_to_text(session.board))
+
+def ck_handle_move(msg, cmd):
+    sender_id = msg.get("sender_id")
+    sender_name = msg.get("name") or "Someone"
+
+    session = get_user_session(sender_id, "checkers")
+    if session is None or session.player2_id is None:
+        return
+
+    squares = ck_parse_move(cmd.text[1:])
+    if squares is None:
+        return
+
+    side = session.current_player
+    player_id, player_name = (
+        (session.player1_id, session.player1_name) if side == "X" else (session.player2_id, session.player2_name)
+    )
+
+    # Enforce turn order
+    if sender_id != player_id:
+        send_message(f"It is {player_name}'s turn {CK_PIECES[(side, False)]}.")
+        return
+
+    moves = ck_generate_moves(session.board, side)
+    move = ck_find_move(moves, squares)
+    if move is None:
+        if moves and ck_is_capture(moves[0]):
+            send_message("That is not a legal move. A capture is available, and captures are mandatory.")
+        else:
+            send_message("That is not a legal move.")
+        return
+
+    session.board = ck_apply_move(session.board, side, move)
+    session.last_activity = time.time()
+
+    send_message(
+        f"{sender_name} played {ck_move_to_text(move)}.\nCurrent board:\n" + ck_board_to_text(session.board)
+    )
+
+    result = ck_check_winner(session.board, ck_other(side))
+
+    if result == side:
+        add_daily_win("checkers", player_id, player_name)
+        send_message(f"{player_name} ({CK_PIECES[(side, False)]}) has won the Checkers game!")
+        end_game_session(session)
+        return
+
+    if result == "draw":
+        send_message(ck_draw_text())
+        end_game_session(session)
+        return
+
+    session.current_player = ck_other(side)
+
+    # AI turn
+    if session.ai_enabled and session.current_player == "O":
+        ck_ai_make_move(session)
+        return
+
+    next_name = session.player1_name if session.current_player == "X" else session.player2_name
+    send_message(f"It is now {next_name}'s turn {CK_PIECES[(session.current_player, False)]}.")
+
+def ck_handle_add_ai(msg, cmd):
+    session = get_user_session(msg.get("sender_id"), "checkers")
+
+    if session is None:
+        send_message("Start a game first with $start.", use_signature=False)
+        return
+
+    if session.player2_id is not None:
+        send_message("A second player has already joined.", use_signature=False)
+        return
+
+    session.ai_enabled = True
+    join_game_session(session, "AI", "AI")
+
+    # Have the endgame table ready before the AI needs it
+    threading.Thread(target=ck_get_endgame_db, daemon=True).start()
+
+    send_message(
+        f"AI has joined as {CK_PIECES[('O', False)]}. {session.player1_name} is {CK_PIECES[('X', False)]} and starts. "
+        f"Move with $C3-D4, or $C3xE5xC7 for jumps.\nCurrent board:\n" + ck_board_to_text(session.board),
+        use_signature=False
+    )
+
+    # If AI goes first
+    if session.current_player == "O":
+        ck_ai_make_move(session)
+
+def ck_ai_make_move(session):
+    move, stats = ck_search(session.board, "O")
+    observe("bot_ai_search_duration_seconds", stats["seconds"], game="checkers")
+    print(
+        f"[CK AI] {ck_move_to_text(move)}: {stats['nodes']} nodes, "
+        f"depth {stats['depth']}, {stats['seconds']:.2f}s"
+    )
+
+    session.board = ck_apply_move(session.board, "O", move)
+    session.last_activity = time.time()
+
+    send_message(
+        f"AI played {ck_move_to_text(move)} "
+        f"(searched {stats['nodes']:,} positions, {stats['depth']} moves ahead).\n"
+        f"Current board:\n" + ck_board_to_text(session.board),
+        use_signature=False
+    )
+
+    result = ck_check_winner(session.board, "X")
+
+    if result == "O":
+        send_message("AI has won the Checkers game!", use_signature=False)
+        end_game_session(session)
+        return
+
+    if result == "draw":
+        send_message(ck_draw_text(), use_signature=False)
+        end_game_session(session)
+        return
+
+    session.current_player = "X"
+    send_message(f"It is now {session.player1_name}'s turn {CK_PIECES[('X', False)]}.")
+
+# ---------------------------------------------------------
+# Checkers endgame table
+# ---------------------------------------------------------
+# Every position with three or fewer pieces, all kings (1 v 1, 2 v 1, 1 v 2),
+# solved once by retrograde analysis and saved as one signed byte per position:
+# 0 draw, +n the side to move wins in n plies, -(n+1) it loses in n plies.
+# The file is memory-mapped, so after the first build it loads instantly.
+CHECKERS_ENDGAME_FILE = "checkers_endgame.bin"
+CK_ENDGAME_MAGIC = b"CKEG\x01\x00\x00\x00"
+
+# Positions are indexed directly from the king squares (2-king sets by combination rank)
+CK_PAIRS = 32 * 31 // 2
+CK_ENDGAME_CLASSES = {(1, 1): 0, (2, 1): 32 * 32, (1, 2): 32 * 32 + CK_PAIRS * 32}
+CK_ENDGAME_SIDE_SIZE = 32 * 32 + 2 * CK_PAIRS * 32
+CK_ENDGAME_SIZE = 2 * CK_ENDGAME_SIDE_SIZE
+
+_ck_endgame = None
+_ck_endgame_failed = False   # the table couldn't be loaded or built; the AI searches without it
+_ck_endgame_lock = threading.Lock()
+
+def ck_square_rank(bits):
+    # One square -> 0..31, two squares a < b -> b*(b-1)/2 + a
+    low = (bits & -bits).bit_length() - 1
+    rest = bits & (bits - 1)
+    if not rest:
+        return low
+    high = rest.bit_length() - 1
+    return high * (high - 1) // 2 + low
+
+def ck_endgame_index(board, side):
+    # Index into the endgame table, or None if the position isn't covered
+    x_bits, o_bits = board["X"], board["O"]
+    if board["K"] != x_bits | o_bits:
+        return None   # men on the board
+
+    offset = CK_ENDGAME_CLASSES.get((popcount(x_bits), popcount(o_bits)))
+    if offset is None:
+        return None
+
+    size = CK_PAIRS if popcount(o_bits) == 2 else 32
+    index = offset + ck_square_rank(x_bits) * size + ck_square_rank(o_bits)
+    return index + (CK_ENDGAME_SIDE_SIZE if side == "O" else 0)
+
+def ck_endgame_positions():
+    # Every covered position as (index, board, side to move)
+    singles = [1 << sq for sq in range(32)]
+    pairs = [(1 << a) | (1 << b) for b in range(32) for a in range(b)]
+
+    for x_sets, o_sets in ((singles, singles), (pairs, singles), (singles, pairs)):
+        for x_bits in x_sets:
+            for o_bits in o_sets:
+                if x_bits & o_bits:
+                    continue
+                for side in ("X", "O"):
+                    board = {"X": x_bits, "O": o_bits, "K": x_bits | o_bits, "quiet": 0}
+                    yield ck_endgame_index(board, side), board, side
+
+def ck_build_endgame_db(path=CHECKERS_ENDGAME_FILE):
+    start = time.perf_counter()
+    values = bytearray(CK_ENDGAME_SIZE)
+    solved = bytearray(CK_ENDGAME_SIZE)
+    parents = {}
+    children_left = {}
+    frontier = deque()   # (index, plies): solved positions, in order of distance
+
+    for index, board, side in ck_endgame_positions():
+        moves = ck_generate_moves(board, side)
+        other = ck_other(side)
+        children_left[index] = len(moves)
+
+        if not moves:
+            values[index] = -1 & 0xFF   # lost now
+            solved[index] = 1
+            frontier.append((index, 0))
+            continue
+
+        for move in moves:
+            child = ck_apply_move(board, side, move)
+            if not child[other]:
+                # Took the last piece
+                if not solved[index]:
+                    values[index] = 1
+                    solved[index] = 1
+                    frontier.append((index, 1))
+                continue
+            parents.setdefault(ck_endgame_index(child, other), []).append(index)
+
+    # Retrograde: a position is won if some move reaches a lost one, and lost
+    # once every move reaches a won one
+    while frontier:
+        index, plies = frontier.popleft()
+        lost = values[index] >= 0x80
+
+        for parent in parents.get(index, ()):
+            if solved[parent]:
+                continue
+
+            if lost:
+                values[parent] = min(plies + 1, 127)
+            else:
+                children_left[parent] -= 1
+                if children_left[parent]:
+                    continue
+                values[parent] = -min(plies + 2, 128) & 0xFF
+            solved[parent] = 1
+            frontier.append((parent, plies + 1))
+
+    write_tmp = f"{path}.tmp"
+    with open(write_tmp, "wb") as f:
+        f.write(CK_ENDGAME_MAGIC)
+        f.write(values)
+    os.replace(write_tmp, path)
+
+    print(f"Built checkers endgame table {path} in {time.perf_counter() - start:.1f}s")
+
+def ck_get_endgame_db():
+    # The memory-mapped table, or None if it can't be loaded or built (e.g. disk full)
+    global _ck_endgame, _ck_endgame_failed
+
+    with _ck_endgame_lock:
+        if _ck_endgame is None and not _ck_endgame_failed:
+            try:
+                for attempt in range(2):
+                    if attempt or not os.path.exists(CHECKERS_ENDGAME_FILE):
+                        ck_build_endgame_db(CHECKERS_ENDGAME_FILE)
+
+                    with open(CHECKERS_ENDGAME_FILE, "rb") as f:
+                        db = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+                    if len(db) == len(CK_ENDGAME_MAGIC) + CK_ENDGAME_SIZE and db[:len(CK_ENDGAME_MAGIC)] == CK_ENDGAME_MAGIC:
+                        _ck_endgame = db
+                        break
+
+                    # Old or damaged file: build it again
+                    db.close()
+            except (OSError, ValueError) as e:
+                # ValueError: mmap of an empty file
+                print(f"[ERROR] Checkers endgame table unavailable: {e}")
+
+            # Not retried on every probe; the search works without it
+            _ck_endgame_failed = _ck_endgame is None
+
+    return _ck_endgame
+
+def ck_endgame_probe(board, side):
+    """
+    Plies to a win (> 0), to a loss (< 0, -1 = lost now), 0 for a draw; None if
+    the position isn't covered.
+
+    The table is built without the CK_DRAW_PLIES rule. A win that takes more
+    plies than are left before the draw (the last, winning move doesn't count)
+    would really be a draw, unless a capture on the way resets the count, which
+    happens when the side with one king wins. So those positions are returned
+    as None and left to the search, which applies the rule itself.
+    """
+    index = ck_endgame_index(board, side)
+    if index is None:
+        return None
+
+    db = ck_get_endgame_db()
+    if db is None:
+        return None
+
+    value = db[len(CK_ENDGAME_MAGIC) + index]
+    if value == 0:
+        return 0
+
+    result = value if value < 0x80 else value - 0x100
+    plies = result if result > 0 else -result - 1
+    if plies > CK_DRAW_PLIES - board["quiet"]:
+        return None
+    return result
+
+# ---------------------------------------------------------
+# Checkers AI: alpha-beta with quiescence over captures
+# ---------------------------------------------------------
+# Iterative deepening negamax. When the depth runs out while a capture is
+# pending the search keeps following captures (they are forced anyway), so
+# positions are never scored in the middle of an exchange. Positions are
+# hashed with Zobrist keys for the transposition table, and positions in the
+# endgame table are scored exactly. The table is cleared for every move and
+# ties keep generation order, so a search bounded by depth or nodes always
+# plays the same move.
+CK_AI_TIME_BUDGET = 1.5       # seconds per AI move
+CK_AI_MAX_DEPTH = 40
+CK_TT_MAX_ENTRIES = 200000
+CK_WIN_SCORE = 10000
+CK_MAN_VALUE = 100
+CK_KING_VALUE = 150
+
+# Rows of squares, bottom to top, for advancement scores
+CK_ROW_MASKS = [0xF << (4 * row) for row in range(8)]
+
+_ck_zobrist_random = random.Random(31)   # fixed seed: the same keys every run
+CK_ZOBRIST = {
+    kind: [_ck_zobrist_random.getrandbits(64) for sq in range(32)]
+    for kind in ("XM", "XK", "OM", "OK")
+}
+CK_ZOBRIST_O_TO_MOVE = _ck_zobrist_random.getrandbits(64)
+
+ck_transposition_table = {}
+
+class CKSearchTimeout(Exception):
+    pass
+
+def ck_piece_sets(board):
+    kings = board["K"]
+    return (
+        ("XM", board["X"] & ~kings), ("XK", board["X"] & kings),
+        ("OM", board["O"] & ~kings), ("OK", board["O"] & kings)
+    )
+
+def ck_zobrist_bits(kind, bits, key=0):
+    table = CK_ZOBRIST[kind]
+    while bits:
+        bit = bits & -bits
+        bits ^= bit
+        key ^= table[bit.bit_length() - 1]
+    return key
+
+def ck_zobrist(board, side):
+    key = CK_ZOBRIST_O_TO_MOVE if side == "O" else 0
+    for kind, bits in ck_piece_sets(board):
+        key = ck_zobrist_bits(kind, bits, key)
+    return key
+
+def ck_zobrist_update(key, before, after):
+    # Only the squares that changed are hashed again
+    for (kind, old), (_, new) in zip(ck_piece_sets(before), ck_piece_sets(after)):
+        if old != new:
+            key = ck_zobrist_bits(kind, old ^ new, key)
+    return key ^ CK_ZOBRIST_O_TO_MOVE
+
+def ck_evaluate(board, side):
+    score = 0
+
+    for player, sign in ((side, 1), (ck_other(side), -1)):
+        men = board[player] & ~board["K"]
+        kings = board[player] & board["K"]
+        value = CK_MAN_VALUE * popcount(men) + CK_KING_VALUE * popcount(kings)
+
+        # Men closer to being crowned, and men still guarding the back row
+        for row, mask in enumerate(CK_ROW_MASKS):
+            value += 3 * (row if player == "X" else 7 - row) * popcount(men & mask)
+        value += 6 * popcount(men & CK_PROMOTION[ck_other(player)])
+
+        score += sign * value
+
+    return score
+
+def ck_order_moves(moves, best_move):
+    # Best move from the table first, then longer captures, keeping generation order for ties
+    ordered = sorted(moves, key=len, reverse=True)
+    if best_move in ordered:
+        ordered.remove(best_move)
+        ordered.insert(0, best_move)
+    return ordered
+
+def ck_negamax(board, side, key, depth, alpha, beta, ply, stats):
+    stats["nodes"] += 1
+    if stats["nodes"] & 1023 == 0 and time.perf_counter() > stats["deadline"]:
+        raise CKSearchTimeout()
+    if stats["nodes"] >= stats["max_nodes"]:
+        raise CKSearchTimeout()
+
+    # Exact result from the endgame table
+    if popcount(board["X"] | board["O"]) <= 3:
+        result = ck_endgame_probe(board, side)
+        if result is not None:
+            if result > 0:
+                return CK_WIN_SCORE - ply - result
+            if result < 0:
+                return -(CK_WIN_SCORE - ply + result + 1)
+            return 0
+
+    moves = ck_generate_moves(board, side)
+    if not moves:
+        return -(CK_WIN_SCORE - ply)
+
+    if board["quiet"] >= CK_DRAW_PLIES:
+        return 0
+
+    # Quiescence: only stop once no capture is pending
+    capturing = ck_is_capture(moves[0])
+    if depth <= 0 and not capturing:
+        return ck_evaluate(board, side)
+
+    entry = ck_transposition_table.get(key)
+    best_move = None
+    if entry is not None:
+        entry_depth, entry_score, entry_flag, best_move = entry
+        if entry_depth >= depth:
+            if entry_flag == 0:
+                return entry_score
+            if entry_flag < 0 and entry_score <= alpha:
+                return entry_score
+            if entry_flag > 0 and entry_score >= beta:
+                return entry_score
+
+    original_alpha = alpha
+    best_score = -CK_WIN_SCORE - 1
+    other = ck_other(side)
+
+    for move in ck_order_moves(moves, best_move):
+        child = ck_apply_move(board, side, move)
+        score = -ck_negamax(
+            child, other, ck_zobrist_update(key, board, child),
+            depth - 1, -beta, -alpha, ply + 1, stats
+        )
+        if score > best_score:
+            best_score = score
+            best_move = move
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            break
+
+    # flag: 0 exact, -1 upper bound (failed low), 1 lower bound (failed high)
+    flag = -1 if best_score <= original_alpha else 1 if best_score >= beta else 0
+    if len(ck_transposition_table) >= CK_TT_MAX_ENTRIES:
+        ck_transposition_table.clear()
+    ck_transposition_table[key] = (depth, best_score, flag, best_move)
+
+    return best_score
+
+def ck_search(board, side, time_budget=None, max_depth=None, max_nodes=None):
+    """
+    Iterative deepening search for `side`.
+    Returns (move, stats) where stats has nodes, depth (deepest finished search),
+    score and seconds. With time_budget=float("inf") and a max_depth or
+    max_nodes the result does not depend on machine speed.
+    """
+    start = time.perf_counter()
+    budget = CK_AI_TIME_BUDGET if time_budget is None else time_budget
+    max_depth = max_depth or CK_AI_MAX_DEPTH
+    stats = {"nodes": 0, "depth": 0, "score": 0, "deadline": start + budget, "max_nodes": max_nodes or float("inf")}
+
+    ck_transposition_table.clear()
+    moves = ck_generate_moves(board, side)
+    best_move = moves[0]
+
+    # Nothing to think about
+    if len(moves) == 1:
+        stats["seconds"] = time.perf_counter() - start
+        del stats["deadline"], stats["max_nodes"]
+        return best_move, stats
+
+    key = ck_zobrist(board, side)
+    other = ck_other(side)
+
+    for depth in range(1, max_depth + 1):
+        alpha = -CK_WIN_SCORE - 1
+        depth_best = best_move
+
+        try:
+            for move in ck_order_moves(moves, best_move):
+                child = ck_apply_move(board, side, move)
+                score = -ck_negamax(
+                    child, other, ck_zobrist_update(key, board, child),
+                    depth - 1, -CK_WIN_SCORE - 1, -alpha, 1, stats
+                )
+                if score > alpha:
+                    alpha = score
+                    depth_best = move
+        except CKSearchTimeout:
+            break
+
+        best_move = depth_best
+        stats["depth"] = depth
+        stats["score"] = alpha
+
+        # A forced result was found, searching deeper won't change it
+        if abs(alpha) > CK_WIN_SCORE - 1000:
+            break
+
+    stats["seconds"] = time.perf_counter() - start
+    del stats["deadline"], stats["max_nodes"]
+    return best_move, stats
+
+# ---------------------------------------------------------
+# Function: check if a message triggers the bot (counter)
+# ---------------------------------------------------------
+def handle_triggers(msg):
+    text = msg.get("text") or ""
+    if not text:
+        return
+
+    # Ignore bot-generated messages
+    if text.lower().endswith(BOT_SIGNATURE.strip().lower()):
+        return
+
+    trigger = match_trigger(text)
+    if trigger is not None:
+        send_message(trigger["response"], use_signature=True)
+
+def handle_listtriggers(msg, cmd):
+    data = load_triggers()
+    triggers = data.get("triggers", {})
+
+    if not triggers:
+        send_message("No triggers are currently set.")
+        return
+
+    lines = ["Triggers:"]
+    for tid, info in triggers.items():
+        modes = [m for m, key in (("whole word", "whole_word"), ("case sensitive", "case_sensitive")) if info.get(key)]
+        suffix = f" ({', '.join(modes)})" if modes else ""
+        lines.append(f"{tid}: {info['word']}{suffix}")
+
+    send_message("\n".join(lines))
+
+
+# ---------------------------------------------------------
+# Message fetching (cursor based, oldest first)
+# ---------------------------------------------------------
+def message_sort_key(msg):
+    # GroupMe message IDs are increasing numeric strings
+    msg_id = str(msg.get("id") or "")
+    return (int(msg_id) if msg_id.isdigit() else 0, msg.get("created_at") or 0)
+
+def latest_message_id(data):
+    if not data or not data.get("response"):
+        return None
+
+    messages = data["response"].get("messages") or []
+    if not messages:
+        return None
+
+    return messages[0]["id"]
+
+def fetch_latest_message_id(group_id=None):
+    group_id = group_id or current_group_id()
+    return latest_message_id(groupme_api(f"groups/{group_id}/messages", params={"limit": 1}))
+
+def messages_after(data, cursor):
+    # Only keep messages newer than the cursor, in the order they were sent
+    response = data.get("response") or {}
+    cursor_key = message_sort_key({"id": cursor})
+
+    return sorted(
+        (m for m in response.get("messages") or [] if message_sort_key(m) > cursor_key),
+        key=message_sort_key
+    )
+
+def fetch_new_messages(after_id, group_id=None):
+    """
+    Pages forward from after_id until caught up.
+    Returns (messages, ok): messages are oldest first, ok is False if a page failed.
+    """
+    group_id = group_id or current_group_id()
+    collected = []
+    cursor = after_id
+
+    while True:
+        data = groupme_api(
+            f"groups/{group_id}/messages",
+            params={"after_id": cursor, "limit": POLL_LIMIT}
+        )
+        if data is None:
+            return collected, False
+
+        page = messages_after(data, cursor)
+        if not page:
+            break
+
+        collected.extend(page)
+        cursor = page[-1]["id"]
+
+        # A short page means we have caught up
+        if len(page) < POLL_LIMIT:
+            break
+
+    return collected, True
+
+# ---------------------------------------------------------
+# Leaderboard / admin list commands
+# ---------------------------------------------------------
+def handle_leaderboard_command(msg, cmd):
+    send_message(get_daily_leaderboard_text())
+
+def handle_monthlyleaders_command(msg, cmd):
+    send_message(get_monthly_text())
+
+def handle_admins_command(msg, cmd):
+    send_message(get_admin_list_text(), use_signature=False)
+
+def handle_stats_command(msg, cmd):
+    if str(msg.get("sender_id")) not in get_admin_ids():
+        send_message("Only admins can see bot stats.")
+        return
+
+    send_message(get_stats_text(), use_signature=False)
+
+def handle_profile_command(msg, cmd):
+    if str(msg.get("sender_id")) not in get_admin_ids():
+        send_message("Only admins can run the profiler.")
+        return
+
+    args = cmd.args.strip().lower()
+
+    if args == "stop":
+        if not stop_profile():
+            send_message("No profile is running.")
+        return
+
+    # "!profile", "!profile 60" (seconds) or "!profile 50 msgs"
+    match = re.fullmatch(r"(?:(\d+)\s*(s|secs?|seconds?|msgs?|messages?)?)?", args)
+    if not match:
+        send_message("Usage: !profile [seconds] / !profile N msgs / !profile stop")
+        return
+
+    number = int(match.group(1)) if match.group(1) else PROFILE_DEFAULT_SECONDS
+    by_messages = (match.group(2) or "s").startswith("m")
+
+    if by_messages:
+        messages = min(max(number, 1), PROFILE_MAX_MESSAGES)
+        started = start_profile(current_group_id(), messages=messages)
+        what = f"the next {messages} messages"
+    else:
+        seconds = min(max(number, 1), PROFILE_MAX_SECONDS)
+        started = start_profile(current_group_id(), seconds=seconds)
+        what = f"{seconds} seconds"
+
+    if not started:
+        send_message("A profile is already running (!profile stop ends it).")
+        return
+
+    send_message(f"Profiling {what}. The results will be posted here.", use_signature=False)
+
+# ---------------------------------------------------------
+# COMMAND ROUTER
+# ---------------------------------------------------------
+# Each message is parsed once into prefix + verb + args ("#start", "=a",
+# "!rmtrigger 3") and sent straight to the handler registered for it.
+# Anything that isn't a known command is plain chat and only goes to the
+# trigger matcher. Handlers are called as handler(msg, cmd).
+# Commands whose verb can be anything (checkers moves) are matched by a regex
+# on the text after the prefix instead.
+COMMAND_PREFIXES = "#=!$"
+
+Command = namedtuple("Command", "prefix verb args text")
+
+_commands = {}   # (prefix, verb) -> handler
+_command_patterns = {}   # prefix -> [(compiled regex, handler)]
+
+def parse_command(text):
+    text = text.strip()
+    if len(text) < 2 or text[0] not in COMMAND_PREFIXES:
+        return None
+
+    parts = text[1:].split(None, 1)
+    if not parts:
+        return None
+
+    return Command(text[0], parts[0].lower(), parts[1] if len(parts) > 1 else "", text)
+
+def register_command(prefix, verb, handler):
+    _commands[(prefix, verb.lower())] = handler
+
+def register_command_pattern(prefix, pattern, handler):
+    _command_patterns.setdefault(prefix, []).append((re.compile(pattern, re.IGNORECASE), handler))
+
+def find_command_handler(cmd):
+    handler = _commands.get((cmd.prefix, cmd.verb))
+    if handler is not None:
+        return handler
+
+    for pattern, pattern_handler in _command_patterns.get(cmd.prefix, ()):
+        if pattern.fullmatch(cmd.text[1:].strip()):
+            return pattern_handler
+
+    return None
+
+# Tic Tac Toe
+register_command("#", "start", ttt_handle_start)
+register_command("#", "join", ttt_handle_join)
+register_command("#", "addai", ttt_handle_add_ai)
+for _letter in "abc":
+    for _number in "123":
+        register_command("#", _letter + _number, ttt_handle_move)   # #A1
+        register_command("#", _number + _letter, ttt_handle_move)   # #1A
+
+# Connect Four
+register_command("=", "start", c4_handle_start)
+register_command("=", "join", c4_handle_join)
+register_command("=", "addai", c4_handle_add_ai)
+for _column in "abcdefg":
+    register_command("=", _column, c4_handle_move)
+
+# Checkers
+register_command("$", "start", ck_handle_start)
+register_command("$", "join", ck_handle_join)
+register_command("$", "addai", ck_handle_add_ai)
+register_command_pattern("$", r"[a-h][1-8](?:\s*[-x]?\s*[a-h][1-8])+", ck_handle_move)   # $C3-D4, $C3xE5xC7
+
+# General
+register_command("!", "help", handle_help_command)
+register_command("!", "leaderboard", handle_leaderboard_command)
+register_command("!", "monthlyleaders", handle_monthlyleaders_command)
+register_command("!", "admins", handle_admins_command)
+register_command("!", "listtriggers", handle_listtriggers)
+
+# Admin only
+register_command("!", "addtrigger", handle_addtrigger)
+register_command("!", "rmtrigger", handle_rmtrigger)
+register_command("!", "stats", handle_stats_command)
+register_command("!", "profile", handle_profile_command)
+
+# ---------------------------------------------------------
+# Message dispatch
+# ---------------------------------------------------------
+def process_message(msg, group_id=None):
+    # The same message can be fetched twice (e.g. when a page is retried)
+    if not mark_message_seen(msg.get("id")):
+        return
+
+    profile_count_message()
+
+    # Everything the handlers do (replies, triggers, leaderboards) goes to this message's group
+    run_in_group(group_id or msg.get("group_id") or current_group_id(), dispatch_message, msg)
+
+def dispatch_message(msg):
+    # -------------------------------
+    # MEMBERSHIP / ROLE CHANGES
+    # -------------------------------
+    handle_membership_event(msg)
+
+    text = msg.get("text") or ""
+    cmd = parse_command(text)
+    handler = find_command_handler(cmd) if cmd else None
+
+    start = time.perf_counter()
+    if handler is not None:
+        handler(msg, cmd)
+    else:
+        handle_triggers(msg)
+    observe("bot_handler_duration_seconds", time.perf_counter() - start, handler=handler.__name__ if handler else "triggers")
+
+def run_tick_housekeeping():
+    # 🔥 DAILY RESET (also awards monthly points), separately for every group
+    for group_id in GROUP_IDS:
+        run_in_group(group_id, reset_daily_leaderboard_if_needed)
+
+    # Idle games are reset once per tick rather than on every message
+    check_game_inactivity()
+
+# ---------------------------------------------------------
+# Polling several groups
+# ---------------------------------------------------------
+# Every group keeps its own cursor. The polls for one tick are issued together
+# on a small thread pool (they share the HTTP connection pool), and the
+# messages are then handled group by group, oldest first.
+_poll_pool = None
+
+def get_poll_pool():
+    global _poll_pool
+
+    if _poll_pool is None:
+        _poll_pool = ThreadPoolExecutor(
+            max_workers=max(1, min(len(GROUP_IDS), API_POOL_SIZE)),
+            thread_name_prefix="poll"
+        )
+    return _poll_pool
+
+def poll_groups(cursors):
+    """
+    Fetches new messages for every group at once. Groups with no cursor yet get
+    one (and no messages). Returns {group_id: (messages, ok)}.
+    """
+    def poll(group_id):
+        cursor = cursors.get(group_id)
+        if cursor is None:
+            cursors[group_id] = fetch_latest_message_id(group_id)
+            return [], cursors[group_id] is not None
+        return fetch_new_messages(cursor, group_id)
+
+    return dict(zip(GROUP_IDS, get_poll_pool().map(poll, GROUP_IDS)))
+
+# ---------------------------------------------------------
+# Saved poll cursors
+# ---------------------------------------------------------
+_saved_cursors = {}
+
+def load_cursors():
+    # {group_id: message ID} for the groups being watched that have a saved cursor
+    global _saved_cursors
+
+    data = read_json_file(CURSOR_FILE, dict)
+    _saved_cursors = {group_id: str(data[group_id]) for group_id in GROUP_IDS if data.get(group_id)}
+    return dict(_saved_cursors)
+
+def save_cursors(cursors):
+    # Only written when a cursor moved (atomically, like the leaderboards)
+    global _saved_cursors
+
+    current = {group_id: cursor for group_id, cursor in cursors.items() if cursor is not None}
+    if current == _saved_cursors:
+        return
+
+    try:
+        write_json_file(CURSOR_FILE, json.dumps(current))
+        _saved_cursors = current
+    except OSError as e:
+        print(f"[ERROR] Could not save {CURSOR_FILE}: {e}")
+
+def init_cursors(cursors):
+    """
+    Groups without a saved cursor start from their newest message (fetched for
+    all of them at once). Groups with one are left alone, so the first poll
+    picks up everything sent since.
+    """
+    missing = [group_id for group_id in GROUP_IDS if cursors.get(group_id) is None]
+    for group_id, cursor in zip(missing, get_poll_pool().map(fetch_latest_message_id, missing)):
+        cursors[group_id] = cursor
+
+# ---------------------------------------------------------
+# BACKFILL (catching up after downtime)
+# ---------------------------------------------------------
+# When the bot starts with a saved cursor, everything sent since is fetched by
+# paging backward with before_id. Messages older than BACKFILL_REPLY_WINDOW are
+# backfilled: only their lasting effects are applied (trigger changes by
+# admins, member list changes), game commands are skipped since games don't
+# survive a restart, and one summary is posted instead of stale replies.
+# Newer missed messages are left to the first poll and answered as usual.
+# Daily/monthly resets and idle game cleanup happen in that first tick too.
+_suppressed_replies = contextvars.ContextVar("suppressed_replies", default=None)
+
+# Commands whose effect outlasts the message; run during a backfill with their replies dropped
+BACKFILL_STATE_COMMANDS = {handle_addtrigger, handle_rmtrigger}
+
+def fetch_missed_messages(cursor, group_id=None):
+    """
+    Pages backward from the newest message with before_id until it reaches the
+    cursor (or BACKFILL_MAX_MESSAGES). Returns (messages, complete): messages
+    are oldest first, or None if a page failed; complete is False if older
+    missed messages were left out.
+    """
+    group_id = group_id or current_group_id()
+    cursor_key = message_sort_key({"id": cursor})[0]
+    collected = []
+    params = {"limit": POLL_LIMIT}
+
+    while True:
+        data = groupme_api(f"groups/{group_id}/messages", params=params)
+        if data is None:
+            return None, False
+
+        page = (data.get("response") or {}).get("messages") or []
+        newer = [m for m in page if message_sort_key(m)[0] > cursor_key]
+        collected.extend(newer)
+
+        # A page that reaches the cursor (or the start of the group) is the last one
+        if len(newer) < len(page) or len(page) < POLL_LIMIT:
+            complete = True
+            break
+
+        if len(collected) >= BACKFILL_MAX_MESSAGES:
+            complete = False
+            break
+
+        params = {"limit": POLL_LIMIT, "before_id": min(page, key=message_sort_key)["id"]}
+
+    collected.sort(key=message_sort_key)
+    return collected[-BACKFILL_MAX_MESSAGES:], complete and len(collected) <= BACKFILL_MAX_MESSAGES
+
+def backfill_message(msg, summary, signature):
+    handle_membership_event(msg)
+
+    text = msg.get("text") or ""
+    cmd = parse_command(text)
+    handler = find_command_handler(cmd) if cmd else None
+
+    if handler in BACKFILL_STATE_COMMANDS:
+        # Only count the commands that changed something, not refused or malformed ones
+        before = set(load_triggers()["triggers"])
+        handler(msg, cmd)
+        if set(load_triggers()["triggers"]) != before:
+            summary["applied"] += 1
+    elif handler is not None:
+        summary["skipped_commands"] += 1
+    elif text and not text.lower().endswith(signature) and match_trigger(text) is not None:
+        summary["skipped_triggers"] += 1
+
+def backfill_messages(messages):
+    """
+    Applies the lasting effects of stale messages for the current group,
+    without replying. Returns counts for the summary.
+    """
+    summary = {"messages": 0, "applied": 0, "skipped_commands": 0, "skipped_triggers": 0}
+    signature = BOT_SIGNATURE.strip().lower()
+
+    token = _suppressed_replies.set([])
+    try:
+        for msg in messages:
+            if not mark_message_seen(msg.get("id")):
+                continue
+            summary["messages"] += 1
+
+            # Like the polling loop, a message that breaks a handler is logged and skipped
+            try:
+                backfill_message(msg, summary, signature)
+            except Exception as e:
+                print(f"[ERROR] Backfill failed on message {msg.get('id')}: {e}")
+    finally:
+        _suppressed_replies.reset(token)
+
+    return summary
+
+def get_backfill_text(summary, complete):
+    skipped = []
+    if summary["skipped_commands"]:
+        skipped.append(f"{summary['skipped_commands']} commands")
+    if summary["skipped_triggers"]:
+        skipped.append(f"{summary['skipped_triggers']} trigger words")
+
+    lines = [f"📥 Back online. Caught up on {summary['messages']} messages sent while I was away."]
+    if skipped:
+        lines.append(f"I didn't answer {' or '.join(skipped)} from then, so send commands again if you still need them.")
+    if summary["applied"]:
+        lines.append(f"{summary['applied']} !addtrigger/!rmtrigger commands were processed.")
+    if not complete:
+        lines.append(f"Messages before the last {BACKFILL_MAX_MESSAGES} were skipped.")
+
+    return "\n".join(lines)
+
+def backfill_groups(cursors):
+    """
+    Catches up every group with a cursor: backfills its missed messages older
+    than BACKFILL_REPLY_WINDOW and moves the cursor past them.
+    """
+    resumed = [group_id for group_id in GROUP_IDS if cursors.get(group_id)]
+    if not BACKFILL_ENABLED or not resumed:
+        return
+
+    fetched = get_poll_pool().map(lambda group_id: fetch_missed_messages(cursors[group_id], group_id), resumed)
+    cutoff = time.time() - BACKFILL_REPLY_WINDOW
+
+    for group_id, (messages, complete) in zip(resumed, fetched):
+        if messages is None:
+            print(f"[WARN] Could not fetch missed messages for group {group_id}, catching up normally")
+            continue
+
+        # Stop at the first recent message, so the cursor never skips past an unanswered one
+        stale = list(itertools.takewhile(lambda m: (m.get("created_at") or 0) < cutoff, messages))
+        if not stale:
+            continue
+
+        start = time.perf_counter()
+        summary = run_in_group(group_id, backfill_messages, stale)
+        elapsed = time.perf_counter() - start
+
+        cursors[group_id] = stale[-1]["id"]
+        print(
+            f"Backfilled {len(stale)} messages for group {group_id} in {elapsed:.2f}s "
+            f"({len(stale) / max(elapsed, 1e-6):,.0f}/s), {len(messages) - len(stale)} left to answer"
+        )
+
+        if summary["messages"]:
+            queue_message(group_id, get_backfill_text(summary, complete))
+
+    save_cursors(cursors)
+
+# ---------------------------------------------------------
+# WEBHOOK INGESTION
+# ---------------------------------------------------------
+# With WEBHOOK_ENABLED, a small HTTP server takes the callback POSTs GroupMe
+# sends for a bot (set the bot's callback URL to http://<host>:WEBHOOK_PORT<WEBHOOK_PATH>).
+# Anyone who can reach the port can post anything to it, so a callback is only
+# taken as a sign that its group has something new: the bot then polls straight
+# away and handles whatever the API returns. The posted message itself (text,
+# sender, ID) is never used.
+#
+# To try it locally, run `python simulate.py --webhook`, or:
+#   curl -X POST -d '{"id": "1", "group_id": "<group id>", "sender_type": "user"}' http://localhost:8080/groupme
+WEBHOOK_MAX_BODY = 64 * 1024
+SEEN_MESSAGE_LIMIT = 5000   # message IDs remembered for de-duplication
+
+webhook_stats = {"received": 0, "rejected": 0}
+
+_webhook_poll_requested = threading.Event()   # set by the server threads
+_webhook_sink = None             # set by the asyncio runtime to wake its poller instead
+_webhook_server = None
+
+_seen_lock = threading.Lock()
+_seen_message_ids = set()
+_seen_message_order = deque()
+
+def mark_message_seen(msg_id):
+    # Returns False if this message was already handled (e.g. a page fetched again after a retry)
+    if not msg_id:
+        return True
+
+    with _seen_lock:
+        if msg_id in _seen_message_ids:
+            return False
+
+        _seen_message_ids.add(msg_id)
+        _seen_message_order.append(msg_id)
+        if len(_seen_message_order) > SEEN_MESSAGE_LIMIT:
+            _seen_message_ids.discard(_seen_message_order.popleft())
+
+    return True
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.split("?")[0] != WEBHOOK_PATH:
+            self.reply(404)
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > WEBHOOK_MAX_BODY:
+            self.reply(413)
+            return
+
+        try:
+            msg = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            msg = None
+
+        group_id = str(msg.get("group_id") or "") if isinstance(msg, dict) else ""
+        if group_id not in GROUP_IDS:
+            webhook_stats["rejected"] += 1
+            self.reply(400)
+            return
+
+        webhook_stats["received"] += 1
+        # GroupMe also calls back for the bot's own posts; those never need a poll
+        if msg.get("sender_type") != "bot":
+            (_webhook_sink or _webhook_poll_requested.set)()
+        self.reply(200)
+
+    def reply(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        # Keep the console for the bot's own output
+        pass
+
+def start_webhook_server():
+    global _webhook_server
+
+    if not WEBHOOK_ENABLED or _webhook_server is not None:
+        return _webhook_server
+
+    try:
+        _webhook_server = ThreadingHTTPServer((WEBHOOK_HOST, WEBHOOK_PORT), WebhookHandler)
+    except OSError as e:
+        print(f"[ERROR] Could not start webhook server on port {WEBHOOK_PORT}: {e}")
+        return None
+
+    _webhook_server.daemon_threads = True
+    threading.Thread(target=_webhook_server.serve_forever, daemon=True).start()
+    print(f"Webhook server listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    return _webhook_server
+
+def stop_webhook_server():
+    global _webhook_server
+
+    if _webhook_server is not None:
+        _webhook_server.shutdown()
+        _webhook_server.server_close()
+        _webhook_server = None
+
+def wait_for_poll_request(timeout):
+    """
+    Waits up to timeout seconds for a webhook callback.
+    Returns True if one came in, i.e. the next poll should go out now.
+    """
+    if _webhook_server is None:
+        time.sleep(max(timeout, 0))
+        return False
+
+    if not _webhook_poll_requested.wait(max(timeout, 0)):
+        return False
+
+    _webhook_poll_requested.clear()
+    return True
+
+# ---------------------------------------------------------
+# Adaptive poll interval
+# ---------------------------------------------------------
+# After every poll the wait until the next one is worked out again: short while
+# a game with both players has seen a move, or people posted, during the last
+# POLL_ACTIVE_WINDOW seconds, otherwise each empty poll stretches it by
+# POLL_BACKOFF up to POLL_INTERVAL_MAX.
+poll_stats = {"interval": POLL_INTERVAL, "polls": 0, "empty_polls": 0, "messages": 0, "last_message_at": None}
+_poll_stats_lock = threading.Lock()
+
+def game_in_progress(now):
+    # A #start nobody joined, or a game left alone, doesn't need fast polling
+    return any(
+        session.player2_id is not None and now - session.last_activity < POLL_ACTIVE_WINDOW
+        for session in list(game_sessions.values())
+    )
+
+def is_bot_message(msg):
+    return msg.get("sender_type") == "bot" or (msg.get("text") or "").lower().endswith(BOT_SIGNATURE.strip().lower())
+
+def record_poll(messages):
+    # messages: everything the poll returned; the bot's own posts don't make the chat busy
+    now = time.time()
+    observe("bot_messages_per_poll", len(messages))
+
+    with _poll_stats_lock:
+        poll_stats["polls"] += 1
+        if messages:
+            poll_stats["messages"] += len(messages)
+        else:
+            poll_stats["empty_polls"] += 1
+        if not all(is_bot_message(msg) for msg in messages):
+            poll_stats["last_message_at"] = now
+
+        last_message_at = poll_stats["last_message_at"]
+        if game_in_progress(now) or (last_message_at is not None and now - last_message_at < POLL_ACTIVE_WINDOW):
+            poll_stats["interval"] = POLL_INTERVAL_MIN
+        else:
+            poll_stats["interval"] = min(max(poll_stats["interval"], POLL_INTERVAL) * POLL_BACKOFF, POLL_INTERVAL_MAX)
+
+def current_poll_interval():
+    # Webhook callbacks bring polls forward, so the regular ones only fill gaps
+    if _webhook_server is not None:
+        return WEBHOOK_POLL_INTERVAL
+    return poll_stats["interval"]
+
+def get_poll_stats():
+    with _poll_stats_lock:
+        return dict(poll_stats, current_interval=current_poll_interval(), webhook=_webhook_server is not None)
+
+# ---------------------------------------------------------
+# Polling loop: watch for mentions, triggers, join events, and games
+# ---------------------------------------------------------
+def handle_polled_message(msg, group_id):
+    # A message whose handler fails is logged and counted as handled; otherwise
+    # the saved cursor would stop in front of it and every restart would fail on it again
+    try:
+        process_message(msg, group_id)
+    except Exception as e:
+        print(f"[ERROR] Handler failed on message {msg.get('id')}: {e}")
+
+def watch_for_mentions():
+    print("Watching for mentions, trigger words, Tic Tac Toe, Connect Four, Checkers, and join events...")
+
+    cursors = load_cursors()   # group_id -> last handled message ID
+    if cursors:
+        print(f"Resuming {len(cursors)} group(s) from {CURSOR_FILE}")
+
+    init_cursors(cursors)
+    if all(cursor is None for cursor in cursors.values()):
+        print("[ERROR] Could not fetch initial messages.")
+        time.sleep(2)
+        return
+
+    backfill_groups(cursors)
+
+    start_webhook_server()
+    start_metrics_server()
+
+    # The first poll goes out straight away to catch up on anything missed
+    next_poll = time.monotonic()
+    last_poll = next_poll - POLL_INTERVAL_MIN
+
+    while True:
+        # The profiler (!profile) covers whole ticks, but not the wait between them.
+        # A profile that ends here queues its summary after the tick's posts were
+        # merged, so merge again; the wait below is then cut short to send it.
+        profile_tick_end()
+        end_outbound_tick()
+
+        # Wake up for the next poll, or earlier once the token bucket lets a queued post go out
+        timeout = next_poll - time.monotonic()
+        outbound_wait = outbound_wait_time()
+        if outbound_wait is not None:
+            timeout = min(timeout, outbound_wait)
+
+        # A webhook callback brings the next poll forward, but never closer than
+        # POLL_INTERVAL_MIN to the last one however many callbacks come in
+        if wait_for_poll_request(timeout):
+            next_poll = min(next_poll, last_poll + POLL_INTERVAL_MIN)
+
+        flush_outbound()
+        if time.monotonic() < next_poll:
+            continue
+
+        profile_tick_begin()
+        run_tick_housekeeping()
+
+        last_poll = time.monotonic()
+        start = time.perf_counter()
+        results = poll_groups(cursors)
+        observe("bot_poll_duration_seconds", time.perf_counter() - start)
+        record_poll([msg for messages, ok in results.values() for msg in messages])
+        next_poll = time.monotonic() + current_poll_interval()
+
+        if not any(ok or messages for messages, ok in results.values()):
+            print("[WARN] No data returned, retrying...")
+            # Housekeeping may have queued posts (daily winners, inactivity resets) this tick
+            end_outbound_tick()
+            flush_outbound()
+            time.sleep(2)
+            continue
+
+        try:
+            for group_id, (messages, ok) in results.items():
+                if not ok and not messages:
+                    print(f"[WARN] No data returned for group {group_id}")
+
+                # Oldest first, so game moves are handled in the order they were sent
+                for msg in messages:
+                    handle_polled_message(msg, group_id)
+                    cursors[group_id] = msg["id"]
+        finally:
+            save_cursors(cursors)
+        end_outbound_tick()
+        flush_outbound()
+
+# ---------------------------------------------------------
+# asyncio runtime: polling, handlers and outbound posts overlap
+# ---------------------------------------------------------
+async def fetch_new_messages_async(after_id, group_id=None):
+    # Same paging as fetch_new_messages, without blocking the event loop
+    group_id = group_id or current_group_id()
+    collected = []
+    cursor = after_id
+
+    while True:
+        data = await groupme_api_async(
+            f"groups/{group_id}/messages",
+            params={"after_id": cursor, "limit": POLL_LIMIT}
+        )
+        if data is None:
+            return collected, False
+
+        page = messages_after(data, cursor)
+        if not page:
+            break
+
+        collected.extend(page)
+        cursor = page[-1]["id"]
+
+        if len(page) < POLL_LIMIT:
+            break
+
+    return collected, True
+
+async def watch_for_mentions_async():
+    """
+    asyncio version of watch_for_mentions.
+
+    The poller, the handler worker and the sender run as separate tasks:
+    handlers (game logic included) stay synchronous and run one at a time in a
+    worker thread, while their replies are posted in the background in order.
+    """
+    global _aiohttp_session, _outbound_wakeup, _webhook_sink
+
+    print("Watching for mentions, trigger words, Tic Tac Toe, Connect Four, Checkers, and join events (asyncio)...")
+
+    loop = asyncio.get_running_loop()
+    inbox = asyncio.Queue()    # callables to run in the handler thread, in order
+    posts_ready = asyncio.Event()
+    poll_now = asyncio.Event()
+
+    def wake_sender():
+        # Called from the handler thread when a tick ends
+        loop.call_soon_threadsafe(posts_ready.set)
+
+    def on_webhook_callback():
+        # Called from a webhook server thread: poll now instead of at the end of the wait
+        loop.call_soon_threadsafe(poll_now.set)
+
+    def process_tick(batches):
+        profile_tick_begin()
+        run_tick_housekeeping()
+        for group_id, messages in batches:
+            for msg in messages:
+                handle_polled_message(msg, group_id)
+            if messages:
+                handled_cursors[group_id] = messages[-1]["id"]
+        save_cursors(handled_cursors)
+        profile_tick_end()
+        end_outbound_tick()
+
+    async def poll_group(group_id):
+        cursor = cursors.get(group_id)
+        if cursor is None:
+            cursors[group_id] = latest_message_id(await groupme_api_async(
+                f"groups/{group_id}/messages", params={"limit": 1}
+            ))
+            return [], cursors[group_id] is not None
+        return await fetch_new_messages_async(cursor, group_id)
+
+    async def handler_worker():
+        while True:
+            job = await inbox.get()
+            try:
+                await asyncio.to_thread(job)
+            except Exception as e:
+                print(f"[ERROR] Handler failed: {e}")
+            inbox.task_done()
+
+    async def send_next_post():
+        # Returns False if nothing is ready yet
+        post = take_outbound_post()
+        if post is None:
+            return False
+
+        group_id, text = post
+        await groupme_api_async(f"groups/{group_id}/messages", method="POST", data=outbound_message_body(text))
+        return True
+
+    async def drain_outbound():
+        while await send_next_post() or outbound_wait_time() is not None:
+            await asyncio.sleep(outbound_wait_time() or 0)
+
+    async def sender_worker():
+        # A single sender keeps replies in the order the handlers produced them
+        while True:
+            if await send_next_post():
+                continue
+
+            wait = outbound_wait_time()
+            if wait is None:
+                await posts_ready.wait()
+                posts_ready.clear()
+            else:
+                await asyncio.sleep(wait)
+
+    if aiohttp is not None:
+        _aiohttp_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=API_POOL_SIZE)
+        )
+    _outbound_wakeup = wake_sender
+    _webhook_sink = on_webhook_callback
+
+    workers = [
+        asyncio.create_task(handler_worker()),
+        asyncio.create_task(sender_worker())
+    ]
+
+    cursors = load_cursors()   # group_id -> last fetched message ID
+    if cursors:
+        print(f"Resuming {len(cursors)} group(s) from {CURSOR_FILE}")
+
+    try:
+        # Only groups without a saved cursor need their newest message looked up
+        await asyncio.gather(*(poll_group(group_id) for group_id in GROUP_IDS if cursors.get(group_id) is None))
+        if all(cursors.get(group_id) is None for group_id in GROUP_IDS):
+            print("[ERROR] Could not fetch initial messages.")
+            await asyncio.sleep(2)
+            return
+
+        await asyncio.to_thread(backfill_groups, cursors)
+        handled_cursors = dict(cursors)   # group_id -> last handled message ID (saved to CURSOR_FILE)
+
+        start_webhook_server()
+        start_metrics_server()
+
+        # The first poll goes out straight away to catch up on anything missed
+        first_poll = True
+        last_poll = time.monotonic()
+
+        while True:
+            if not first_poll:
+                # A webhook callback cuts the wait short; polls still stay POLL_INTERVAL_MIN apart
+                try:
+                    await asyncio.wait_for(poll_now.wait(), timeout=current_poll_interval())
+                    await asyncio.sleep(last_poll + POLL_INTERVAL_MIN - time.monotonic())
+                except asyncio.TimeoutError:
+                    pass
+            first_poll = False
+            poll_now.clear()
+            last_poll = time.monotonic()
+
+            # One poll per group, all in flight at once
+            start = time.perf_counter()
+            results = await asyncio.gather(*(poll_group(group_id) for group_id in GROUP_IDS))
+            observe("bot_poll_duration_seconds", time.perf_counter() - start)
+            record_poll([msg for messages, ok in results for msg in messages])
+
+            if not any(ok or messages for messages, ok in results):
+                print("[WARN] No data returned, retrying...")
+                await asyncio.sleep(2)
+                continue
+
+            batches = list(zip(GROUP_IDS, (messages for messages, ok in results)))
+            inbox.put_nowait(functools.partial(process_tick, batches))
+            for group_id, messages in batches:
+                if messages:
+                    cursors[group_id] = messages[-1]["id"]
+    finally:
+        # Stop taking webhook callbacks, then let queued replies go out before shutting down
+        _webhook_sink = None
+        stop_webhook_server()
+        await inbox.join()
+        end_outbound_tick()
+        try:
+            await asyncio.wait_for(drain_outbound(), timeout=10)
+        except asyncio.TimeoutError:
+            print("[WARN] Gave up sending queued messages at shutdown")
+
+        for task in workers:
+            task.cancel()
+
+        _outbound_wakeup = None
+        if _aiohttp_session is not None:
+            await _aiohttp_session.close()
+            _aiohttp_session = None
+
+# ---------------------------------------------------------
+# Start the bot
+# ---------------------------------------------------------
+# Only when run as a script, so benchmark.py and other tools can import this file
+if __name__ == "__main__":
+    # Admin scan at startup, alongside the first poll
+    print("Scanning for admins at startup...")
+    threading.Thread(target=scan_admins_at_startup, daemon=True).start()
+
+    # Start the bot
+    if USE_ASYNCIO:
+        asyncio.run(watch_for_mentions_async())
+    else:
+        watch_for_mentions()
\ No newline at end of file
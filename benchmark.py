@@ -0,0 +1,443 @@
+"""
+Offline microbenchmarks for the bot's hot paths: the game engines and AIs,
+trigger matching, backfill, board rendering, the leaderboard text and
+recording wins.
+
+    python benchmark.py                          # run everything and print a table
+    python benchmark.py -o results.json          # also save the results
+    python benchmark.py --compare results.json   # compare with an earlier run
+    python benchmark.py -k c4 -k render          # only benchmarks whose name contains c4 or render
+
+Every benchmark runs on fixed, seeded positions and messages, so two runs
+measure the same work and can be compared (on the same machine). Nothing
+touches the network, and the leaderboards and triggers used are created in a
+temporary directory.
+
+With --compare, the exit status is 1 if any benchmark got slower than the
+--threshold allows (default 10% fewer ops/sec).
+"""
+import argparse
+import atexit
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Leaderboard and trigger files go to a scratch directory, never the bot's real ones
+START_DIR = os.getcwd()
+SCRATCH_DIR = tempfile.mkdtemp(prefix="clean-memes-bench-")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(SCRATCH_DIR)
+
+def remove_scratch_dir():
+    # Registered before the bot is imported, so it runs after the bot's own exit handlers
+    os.chdir(START_DIR)
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+atexit.register(remove_scratch_dir)
+
+import Groupme_Bot as bot
+
+BENCH_SEED = 1234
+SAMPLE_TIME = 0.005   # seconds per timing sample; fast operations are repeated to fill it
+DEFAULT_SAMPLES = 200
+DEFAULT_THRESHOLD = 0.10
+
+BENCHMARKS = []   # (name, setup): setup() returns the operation to time
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+def cycle(items):
+    # An operation that walks through the inputs in order, forever
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+
+    return next_item
+
+# ---------------------------------------------------------
+# Seeded positions
+# ---------------------------------------------------------
+def ttt_positions(count, rng):
+    # Unfinished positions from random play, as (mover_bits, other_bits)
+    positions = []
+    while len(positions) < count:
+        me, opp = 0, 0
+        for ply in range(rng.randint(1, 6)):
+            empty = [i for i in range(9) if not (me | opp) >> i & 1]
+            me |= 1 << rng.choice(empty)
+            if bot.ttt_has_line(me):
+                break
+            me, opp = opp, me
+        else:
+            positions.append((me, opp))
+    return positions
+
+def c4_random_board(rng, plies):
+    board = bot.c4_init_board()
+    piece = "X"
+    for ply in range(plies):
+        open_columns = [c for c in range(bot.C4_COLS) if board["heights"][c] - c * bot.C4_COLUMN_BITS < bot.C4_ROWS]
+        bot.c4_drop_piece(board, rng.choice(open_columns), piece)
+        if bot.c4_check_winner(board):
+            break
+        piece = "O" if piece == "X" else "X"
+    return board
+
+def ck_random_board(rng, plies):
+    board = bot.ck_init_board()
+    side = "X"
+    for ply in range(plies):
+        moves = bot.ck_generate_moves(board, side)
+        if not moves:
+            break
+        board = bot.ck_apply_move(board, side, rng.choice(moves))
+        side = bot.ck_other(side)
+    return board, side
+
+# ---------------------------------------------------------
+# Game engines
+# ---------------------------------------------------------
+@benchmark("ttt_minimax_full_solve")
+def bench_ttt_full_solve():
+    # What the first AI move of a run pays: every position solved from the empty board
+    return lambda: bot.ttt_minimax(0, 0, {}, {})
+
+@benchmark("ttt_minimax_position")
+def bench_ttt_minimax_position():
+    next_position = cycle(ttt_positions(200, random.Random(BENCH_SEED)))
+
+    def op():
+        me, opp = next_position()
+        bot.ttt_minimax(me, opp, {}, {})
+
+    return op
+
+@benchmark("ttt_ai_move_lookup")
+def bench_ttt_lookup():
+    table = bot.ttt_get_move_table()
+    next_position = cycle(ttt_positions(500, random.Random(BENCH_SEED)))
+    return lambda: table[next_position()]
+
+@benchmark("c4_check_winner")
+def bench_c4_check_winner():
+    rng = random.Random(BENCH_SEED)
+    next_board = cycle([c4_random_board(rng, rng.randint(7, 40)) for i in range(500)])
+    return lambda: bot.c4_check_winner(next_board())
+
+@benchmark("c4_search_depth6")
+def bench_c4_search():
+    rng = random.Random(BENCH_SEED)
+    boards = []
+    while len(boards) < 20:
+        board = c4_random_board(rng, 8)
+        if not bot.c4_check_winner(board) and board["last"] is not None:
+            boards.append(board)
+    next_board = cycle(boards)
+
+    def op():
+        board = next_board()
+        bot.c4_transposition_table.clear()
+        bot.c4_search(board["X"], board["X"] | board["O"], time_budget=float("inf"), max_depth=6)
+
+    return op
+
+@benchmark("ck_generate_moves")
+def bench_ck_generate_moves():
+    rng = random.Random(BENCH_SEED)
+    next_position = cycle([ck_random_board(rng, rng.randint(0, 60)) for i in range(500)])
+
+    def op():
+        board, side = next_position()
+        bot.ck_generate_moves(board, side)
+
+    return op
+
+@benchmark("ck_search_depth4")
+def bench_ck_search():
+    rng = random.Random(BENCH_SEED)
+    positions = []
+    while len(positions) < 20:
+        board, side = ck_random_board(rng, 12)
+        if bot.ck_has_moves(board, side):
+            positions.append((board, side))
+    next_position = cycle(positions)
+
+    def op():
+        board, side = next_position()
+        bot.ck_search(board, side, time_budget=float("inf"), max_depth=4)
+
+    return op
+
+# ---------------------------------------------------------
+# Trigger matching
+# ---------------------------------------------------------
+WORDS = (
+    "lol meme bruh that is so funny who did this clean memes today tomorrow "
+    "game play win lose again please stop posting cat dog frog pepe based "
+    "cringe ratio sus cap no yes maybe ok okay hello hi hey bye"
+).split()
+
+@benchmark("handle_triggers")
+def bench_handle_triggers():
+    rng = random.Random(BENCH_SEED)
+    storage = bot.get_storage()
+
+    # 300 triggers: one per vocabulary word plus made-up words, in all four modes
+    trigger_words = WORDS + [f"{rng.choice(WORDS)}{i}" for i in range(300 - len(WORDS))]
+    for i, word in enumerate(trigger_words):
+        storage.add_trigger({
+            "word": word,
+            "response": f"response {i}",
+            "whole_word": i % 2 == 0,
+            "case_sensitive": i % 3 == 0
+        })
+    bot.invalidate_trigger_matcher()
+
+    # Mostly plain chat, some of it containing a trigger word
+    messages = []
+    for i in range(1000):
+        words = [rng.choice(WORDS) for w in range(rng.randint(3, 20))]
+        if rng.random() < 0.7:
+            words = [f"x{w}y" for w in words]   # chat that matches nothing
+        messages.append({"id": str(i), "text": " ".join(words), "sender_id": "1", "name": "Bench"})
+    next_message = cycle(messages)
+
+    def op():
+        bot.handle_triggers(next_message())
+        if len(bot._outbound_pending) > 1000:
+            bot._outbound_pending.clear()
+
+    return op
+
+@benchmark("backfill_1000_messages")
+def bench_backfill():
+    # Catching up on 1000 missed messages: chat, trigger words and commands, nothing posted
+    rng = random.Random(BENCH_SEED)
+    templates = []
+    for i in range(1000):
+        roll = rng.random()
+        if roll < 0.05:
+            text = rng.choice(["!help", "!leaderboard", "#start", "#1A", "=D", "$C3-D4"])
+        else:
+            text = " ".join(rng.choice(WORDS) for w in range(rng.randint(3, 20)))
+        templates.append({"text": text, "sender_id": "1", "name": "Bench", "created_at": 0})
+
+    next_id = itertools.count(1)
+
+    def op():
+        # Fresh IDs every time, or the seen-message check would skip them all
+        bot.backfill_messages([dict(msg, id=str(next(next_id))) for msg in templates])
+
+    return op
+
+# ---------------------------------------------------------
+# Board rendering
+# ---------------------------------------------------------
+@benchmark("render_ttt_board")
+def bench_render_ttt():
+    sessions = []
+    for me, opp in ttt_positions(100, random.Random(BENCH_SEED)):
+        session = bot.GameSession(0, "tictactoe", bot.GROUP_ID, "1", "Bench", [me, opp])
+        sessions.append(session)
+    next_session = cycle(sessions)
+    return lambda: bot.ttt_board_to_text(next_session())
+
+@benchmark("render_c4_board")
+def bench_render_c4():
+    rng = random.Random(BENCH_SEED)
+    next_board = cycle([c4_random_board(rng, rng.randint(0, 30)) for i in range(100)])
+    return lambda: bot.c4_board_to_text(next_board())
+
+@benchmark("render_ck_board")
+def bench_render_ck():
+    rng = random.Random(BENCH_SEED)
+    next_position = cycle([ck_random_board(rng, rng.randint(0, 40)) for i in range(100)])
+    return lambda: bot.ck_board_to_text(next_position()[0])
+
+# ---------------------------------------------------------
+# Leaderboards
+# ---------------------------------------------------------
+def fill_leaderboards():
+    rng = random.Random(BENCH_SEED)
+    storage = bot.get_storage()
+    storage.reset_daily(time.strftime("%Y-%m-%d"))
+    storage.reset_monthly(time.strftime("%Y-%m"))
+
+    for i in range(3000):
+        user = rng.randint(1, 200)
+        storage.record_win(rng.choice(bot.DAILY_GAMES), str(user), f"User {user}")
+    for i in range(500):
+        user = rng.randint(1, 200)
+        storage.add_monthly_point(str(user), f"User {user}")
+
+    bot.flush_leaderboards()
+
+@benchmark("leaderboard_text")
+def bench_leaderboard_text():
+    fill_leaderboards()
+
+    def op():
+        bot.get_daily_leaderboard_text()
+        bot.get_monthly_text()
+
+    return op
+
+@benchmark("leaderboard_text_cold")
+def bench_leaderboard_text_cold():
+    # Same, but the leaderboards are read from disk every time
+    fill_leaderboards()
+
+    def op():
+        with bot._leaderboard_lock:
+            bot._leaderboards.clear()
+        bot.get_daily_leaderboard_text()
+        bot.get_monthly_text()
+
+    return op
+
+@benchmark("leaderboard_record_win")
+def bench_leaderboard_record_win():
+    # One win appended to the event log (fsync included when LEADERBOARD_FSYNC is on)
+    fill_leaderboards()
+    storage = bot.get_storage()
+    next_user = cycle([str(user) for user in range(1, 201)])
+
+    return lambda: storage.record_win("tictactoe", next_user(), "User")
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def time_calls(op, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        op()
+    return time.perf_counter() - start
+
+def run_benchmark(setup, samples):
+    op = setup()
+
+    # Warm up, then find how many calls fill one sample
+    calls = 1
+    while time_calls(op, calls) < SAMPLE_TIME and calls < 1 << 20:
+        calls *= 2
+
+    # Seconds per call, one value per sample
+    timings = sorted(time_calls(op, calls) / calls for i in range(samples))
+    mean = sum(timings) / len(timings)
+    median = percentile(timings, 0.50)
+
+    return {
+        "ops_per_sec": 1 / median,
+        "mean_us": mean * 1e6,
+        "p50_us": median * 1e6,
+        "p95_us": percentile(timings, 0.95) * 1e6,
+        "p99_us": percentile(timings, 0.99) * 1e6,
+        "min_us": timings[0] * 1e6,
+        "max_us": timings[-1] * 1e6,
+        "calls_per_sample": calls,
+        "samples": samples
+    }
+
+def compare_results(results, baseline, threshold):
+    # name -> relative change in ops/sec (+0.2 = 20% faster), and the names that regressed
+    changes = {}
+    regressions = []
+
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1
+        changes[name] = change
+        if change < -threshold:
+            regressions.append(name)
+
+    return changes, regressions
+
+def print_table(results, changes):
+    header = f"{'benchmark':<26} {'ops/sec':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}"
+    if changes:
+        header += f" {'change':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for name, r in results.items():
+        line = f"{name:<26} {r['ops_per_sec']:>12,.1f} {r['p50_us']:>10.1f} {r['p95_us']:>10.1f} {r['p99_us']:>10.1f}"
+        if name in changes:
+            line += f" {changes[name]:>+8.1%}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the Clean Memes bot")
+    parser.add_argument("-o", "--output", help="save the results as JSON to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a benchmark counts as a regression (default 0.10 = 10%%)")
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="only run benchmarks whose name contains this (can be repeated)")
+    parser.add_argument("-n", "--samples", type=int, default=DEFAULT_SAMPLES, help="timing samples per benchmark")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args()
+
+    selected = [(name, setup) for name, setup in BENCHMARKS
+                if not args.filter or any(f in name for f in args.filter)]
+
+    if args.list:
+        for name, setup in selected:
+            print(name)
+        return 0
+
+    results = {}
+    for name, setup in selected:
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = run_benchmark(setup, args.samples)
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(START_DIR, args.compare)) as f:
+            baseline = json.load(f)
+
+    changes, regressions = compare_results(results, baseline, args.threshold) if baseline else ({}, [])
+    print_table(results, changes)
+
+    if args.output:
+        report = {
+            "meta": {
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "seed": BENCH_SEED,
+                "samples": args.samples
+            },
+            "results": results
+        }
+        with open(os.path.join(START_DIR, args.output), "w") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
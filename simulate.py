@@ -0,0 +1,613 @@
+"""
+Local GroupMe stand-in and end-to-end load simulator.
+
+Starts a fake GroupMe API on localhost, points the bot at it (BASE_URL) and
+runs the bot's polling loop in this process. Then it plays simulated users
+against it: pairs of users playing Tic Tac Toe, and everyone chatting,
+setting off triggers and asking for !help / !leaderboard at the chosen rate.
+
+    python simulate.py                                    # 20 users, 5 games, 2 chat messages/s, 60 s
+    python simulate.py --users 50 --games 10 --rate 5 --duration 120
+    python simulate.py --latency 0.2 --jitter 0.1 --error-rate 0.02 --rate-limit 0.02
+    python simulate.py --webhook                          # also send GroupMe bot callbacks to the bot
+    python simulate.py --no-bot --port 8099               # drive a bot started separately
+    python simulate.py --server-only --port 8099          # only the fake API
+
+For --no-bot / --server-only, set the bot's BASE_URL to http://127.0.0.1:<port>/v3
+and GROUP_ID / MAIN_GROUP_ID to the group IDs printed at startup (and pass
+--webhook http://127.0.0.1:8080/groupme to send callbacks to its webhook server).
+
+With --webhook every new message is also POSTed to the bot's webhook server the
+way GroupMe calls back a bot, and one forged callback (an admin command that
+isn't in the API) is sent after setup: the report shows whether it was acted on.
+
+The report covers reply latency (from a user's message to the bot post that
+answers it), commands that never got an answer, and API requests per user
+message. --json saves it to a file.
+
+The fake API implements:
+    GET  /v3/groups/:id/messages   limit, before_id, since_id, after_id (304 when nothing is new)
+    POST /v3/groups/:id/messages
+    GET  /v3/groups/:id            group info with the member list
+"""
+import argparse
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SIM_GROUP_ID = "1000"
+SIM_MAIN_GROUP_ID = "1001"
+SIM_ADMIN_ID = "200000"
+SIM_TRIGGERS = 5
+
+# ---------------------------------------------------------
+# Fake GroupMe API
+# ---------------------------------------------------------
+class FakeGroupMe:
+    """
+    In-memory groups with GroupMe's message paging, plus injected latency,
+    server errors and 429s.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.messages = {}      # group_id -> messages, oldest first
+        self.members = []       # the same member list for every group
+        self.next_id = 100000
+        self.requests = Counter()   # (method, endpoint, status) -> count
+        self.on_post = None         # called with (message, received_at) for every POST
+        self.callback_url = None    # bot callback URL; every new message is also POSTed there
+
+    def add_member(self, user_id, name, roles=("user",)):
+        self.members.append({"user_id": user_id, "nickname": name, "name": name, "roles": list(roles)})
+
+    def add_message(self, group_id, user_id, name, text, sender_type="user"):
+        with self.lock:
+            self.next_id += 1
+            msg = {
+                "id": str(self.next_id),
+                "group_id": group_id,
+                "created_at": time.time(),
+                "sender_id": user_id,
+                "user_id": user_id,
+                "sender_type": sender_type,
+                "name": name,
+                "text": text,
+                "system": False,
+                "attachments": []
+            }
+            self.messages.setdefault(group_id, []).append(msg)
+
+        if self.callback_url:
+            threading.Thread(target=send_callback, args=(self.callback_url, msg), daemon=True).start()
+        return msg
+
+    def list_messages(self, group_id, params):
+        limit = max(1, min(int(params.get("limit", 20)), 100))
+
+        with self.lock:
+            msgs = list(self.messages.get(group_id, []))
+
+        if "before_id" in params:
+            before = int(params["before_id"])
+            page = [m for m in msgs if int(m["id"]) < before][-limit:][::-1]
+        elif "since_id" in params:
+            since = int(params["since_id"])
+            page = [m for m in msgs if int(m["id"]) > since][-limit:][::-1]
+        elif "after_id" in params:
+            after = int(params["after_id"])
+            page = [m for m in msgs if int(m["id"]) > after][:limit]
+        else:
+            page = msgs[-limit:][::-1]
+
+        if not page and ("since_id" in params or "after_id" in params):
+            return 304, None
+
+        return 200, {"response": {"count": len(msgs), "messages": page}, "meta": {"code": 200}}
+
+    def handle(self, method, path, params, body):
+        # Returns (status, JSON body or None, extra headers)
+        parts = path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "v3" or parts[1] != "groups":
+            return 404, {"meta": {"code": 404, "errors": ["not found"]}}, {}
+
+        group_id = parts[2]
+        endpoint = "groups/:id" + ("/" + "/".join(parts[3:]) if len(parts) > 3 else "")
+
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            self.count(method, endpoint, 429)
+            return 429, {"meta": {"code": 429, "errors": ["rate limited"]}}, {"Retry-After": "1"}
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.count(method, endpoint, 500)
+            return 500, {"meta": {"code": 500, "errors": ["injected error"]}}, {}
+
+        if endpoint == "groups/:id/messages" and method == "GET":
+            status, payload = self.list_messages(group_id, params)
+        elif endpoint == "groups/:id/messages" and method == "POST":
+            text = ((body or {}).get("message") or {}).get("text", "")
+            msg = self.add_message(group_id, "bot", "Clanker", text)
+            if self.on_post is not None:
+                self.on_post(msg, time.time())
+            status, payload = 201, {"response": {"message": msg}, "meta": {"code": 201}}
+        elif endpoint == "groups/:id" and method == "GET":
+            status, payload = 200, {"response": {"id": group_id, "name": f"Sim {group_id}", "members": self.members}}
+        else:
+            status, payload = 404, {"meta": {"code": 404, "errors": ["not found"]}}
+
+        self.count(method, endpoint, status)
+        return status, payload, {}
+
+    def count(self, method, endpoint, status):
+        with self.lock:
+            self.requests[(method, endpoint, status)] += 1
+
+    def request_total(self):
+        with self.lock:
+            return sum(self.requests.values())
+
+class FakeGroupMeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        body = None
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                body = None
+
+        status, payload, headers = self.server.fake.handle(method, url.path, params, body)
+
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_server(fake, port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeGroupMeHandler)
+    server.daemon_threads = True
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def send_callback(url, msg):
+    # The same JSON GroupMe POSTs to a bot's callback URL
+    request = urllib.request.Request(
+        url, data=json.dumps(msg).encode(), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    try:
+        urllib.request.urlopen(request, timeout=5).close()
+    except OSError:
+        pass
+
+# ---------------------------------------------------------
+# Simulated users
+# ---------------------------------------------------------
+CHAT_WORDS = (
+    "lol meme bruh that is so funny who did this clean memes today tomorrow "
+    "game play win again please stop posting cat dog frog based ratio ok"
+).split()
+
+TTT_LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+TTT_CELLS = ["1A", "1B", "1C", "2A", "2B", "2C", "3A", "3B", "3C"]
+
+class Expectation:
+    __slots__ = ("marker", "kind", "sent_at", "on_reply")
+
+    def __init__(self, marker, kind, sent_at, on_reply=None):
+        self.marker = marker
+        self.kind = kind
+        self.sent_at = sent_at
+        self.on_reply = on_reply
+
+class SimGame:
+    """
+    One pair of users playing Tic Tac Toe over and over. Every step waits for
+    the bot's answer to the previous one, plus a little thinking time.
+    """
+
+    def __init__(self, sim, player1, player2):
+        self.sim = sim
+        self.players = (player1, player2)
+        self.step = "start"
+        self.next_at = time.time() + sim.random.uniform(0, sim.think)
+        self.game_number = None
+        self.cells = {}
+        self.turn = 0
+        self.stalled = False
+
+    def due(self, now):
+        return not self.stalled and self.step is not None and now >= self.next_at
+
+    def advance(self, now):
+        sim = self.sim
+        step, self.step = self.step, None
+        p1, p2 = self.players
+
+        if step == "start":
+            self.cells = {}
+            self.turn = 0
+            sim.send(p1, "#start", f"{p1[1]} has started a Tic Tac Toe game", "game", self.started)
+        elif step == "join":
+            sim.send(p2, f"#join {self.game_number}", f"{p2[1]} has joined!", "game", self.next_move)
+        elif step == "move":
+            player = self.players[self.turn]
+            cell = sim.random.choice([i for i in range(9) if i not in self.cells])
+            self.cells[cell] = self.turn
+            sim.send(player, f"#{TTT_CELLS[cell]}", f"{player[1]} played {TTT_CELLS[cell]}.", "move", self.moved)
+
+    def wait(self, step):
+        self.step = step
+        self.next_at = time.time() + self.sim.random.uniform(0.2, self.sim.think)
+
+    def started(self, post):
+        # A merged post can announce several games; find ours by the player's name
+        match = re.search(re.escape(self.players[0][1]) + r" has started a Tic Tac Toe game \(game (\d+)\)", post)
+        self.game_number = match.group(1) if match else ""
+        self.wait("join")
+
+    def next_move(self, post):
+        self.wait("move")
+
+    def moved(self, post):
+        mine = {cell for cell, player in self.cells.items() if player == self.turn}
+        if any(all(c in mine for c in line) for line in TTT_LINES) or len(self.cells) == 9:
+            self.sim.games_finished += 1
+            self.wait("start")
+            return
+
+        self.turn = 1 - self.turn
+        self.wait("move")
+
+class Simulator:
+    def __init__(self, fake, group_id, users, games, rate, think, reply_timeout, seed):
+        self.fake = fake
+        self.group_id = group_id
+        self.rate = rate
+        self.think = think
+        self.reply_timeout = reply_timeout
+        self.random = random.Random(seed)
+
+        self.users = [(str(100000 + i), f"User {i + 1}") for i in range(users)]
+        self.admin = (SIM_ADMIN_ID, "Sim Admin")
+        for user_id, name in self.users:
+            fake.add_member(user_id, name)
+        fake.add_member(self.admin[0], self.admin[1], roles=("admin", "user"))
+
+        players = self.users[:2 * games]
+        self.games = [SimGame(self, players[i], players[i + 1]) for i in range(0, len(players) - 1, 2)]
+
+        self.posts = queue.Queue()
+        fake.on_post = lambda msg, received_at: self.posts.put((msg["text"], received_at))
+
+        self.pending = []       # Expectations, oldest first
+        self.latencies = {}     # kind -> [seconds]
+        self.sent = Counter()   # kind -> messages sent
+        self.dropped = Counter()
+        self.bot_posts = 0
+        self.games_finished = 0
+        self.forged_answered = 0
+
+    def send(self, user, text, marker=None, kind="chat", on_reply=None):
+        msg = self.fake.add_message(self.group_id, user[0], user[1], text)
+        self.sent[kind] += 1
+        if marker is not None:
+            self.pending.append(Expectation(marker, kind, msg["created_at"], on_reply))
+
+    def send_chat(self):
+        user = self.random.choice(self.users)
+        roll = self.random.random()
+
+        if roll < 0.05:
+            self.send(user, "!help", "HELP MENU", "command")
+        elif roll < 0.10:
+            self.send(user, "!leaderboard", "Daily Game Leaders", "command")
+        elif roll < 0.25:
+            n = self.random.randrange(SIM_TRIGGERS)
+            words = [self.random.choice(CHAT_WORDS) for i in range(self.random.randint(2, 8))]
+            words.insert(self.random.randint(0, len(words)), f"simword{n}")
+            self.send(user, " ".join(words), f"sim reply {n}!", "trigger")
+        else:
+            words = [self.random.choice(CHAT_WORDS) for i in range(self.random.randint(2, 15))]
+            self.send(user, " ".join(words))
+
+    def check_replies(self, now):
+        while True:
+            try:
+                text, received_at = self.posts.get_nowait()
+            except queue.Empty:
+                break
+
+            self.bot_posts += 1
+            if "simforged" in text:
+                self.forged_answered += 1
+
+            # A merged post can answer several messages; each marker occurrence answers one
+            available = Counter()
+            for expectation in list(self.pending):
+                if expectation.marker not in text:
+                    continue
+                if expectation.marker not in available:
+                    available[expectation.marker] = text.count(expectation.marker)
+                if available[expectation.marker] <= 0:
+                    continue
+
+                available[expectation.marker] -= 1
+                self.pending.remove(expectation)
+                self.latencies.setdefault(expectation.kind, []).append(received_at - expectation.sent_at)
+                if expectation.on_reply is not None:
+                    expectation.on_reply(text)
+
+        for expectation in [e for e in self.pending if now - e.sent_at > self.reply_timeout]:
+            self.pending.remove(expectation)
+            self.dropped[expectation.kind] += 1
+            for game in self.games:
+                if expectation.on_reply in (game.started, game.next_move, game.moved):
+                    game.stalled = True
+
+    def setup_triggers(self):
+        for n in range(SIM_TRIGGERS):
+            self.send(self.admin, f'!addtrigger simword{n} "sim reply {n}!"', f"Trigger added: `simword{n}`", "setup")
+
+        deadline = time.time() + self.reply_timeout
+        while any(e.kind == "setup" for e in self.pending) and time.time() < deadline:
+            self.check_replies(time.time())
+            time.sleep(0.05)
+
+    def forge_callback(self):
+        # A made-up admin command with a future ID, posted straight to the webhook and never to the API
+        send_callback(self.fake.callback_url, {
+            "id": "999999999", "group_id": self.group_id, "created_at": time.time(),
+            "sender_id": self.admin[0], "user_id": self.admin[0], "sender_type": "user",
+            "name": self.admin[1], "text": '!addtrigger simforged "simforged reply"',
+            "system": False, "attachments": []
+        })
+
+    def run(self, duration, grace):
+        start = time.time()
+        end = start + duration
+        next_chat = start + self.random.expovariate(self.rate) if self.rate > 0 else float("inf")
+
+        while time.time() < end:
+            now = time.time()
+            self.check_replies(now)
+
+            while now >= next_chat:
+                self.send_chat()
+                next_chat += self.random.expovariate(self.rate)
+
+            for game in self.games:
+                if game.due(now):
+                    game.advance(now)
+
+            time.sleep(0.01)
+
+        # Give the bot time to answer what is still outstanding
+        grace_end = time.time() + grace
+        while self.pending and time.time() < grace_end:
+            self.check_replies(time.time())
+            time.sleep(0.05)
+        self.check_replies(time.time())
+
+        for expectation in self.pending:
+            self.dropped[expectation.kind] += 1
+
+        return time.time() - start
+
+# ---------------------------------------------------------
+# Report
+# ---------------------------------------------------------
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def build_report(sim, fake, elapsed, requests_before, args):
+    user_messages = sum(count for kind, count in sim.sent.items() if kind != "setup")
+    requests = fake.request_total() - sum(requests_before.values())
+
+    latency = {}
+    for kind, values in sorted(sim.latencies.items()):
+        values = sorted(values)
+        latency[kind] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000
+        }
+
+    by_endpoint = Counter()
+    for (method, endpoint, status), count in (fake.requests - requests_before).items():
+        by_endpoint[f"{method} {endpoint} {status}"] += count
+
+    return {
+        "settings": {
+            "users": args.users, "games": len(sim.games), "rate": args.rate, "duration": args.duration,
+            "latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+            "rate_limit": args.rate_limit, "seed": args.seed, "webhook": args.webhook is not None
+        },
+        "elapsed_s": elapsed,
+        "messages_sent": dict(sim.sent),
+        "user_messages": user_messages,
+        "bot_posts": sim.bot_posts,
+        "games_finished": sim.games_finished,
+        "reply_latency": latency,
+        "dropped": dict(sim.dropped),
+        "forged_callbacks_answered": sim.forged_answered if args.webhook is not None else None,
+        "api_requests": requests,
+        "requests_per_message": requests / user_messages if user_messages else None,
+        "requests_by_endpoint": dict(sorted(by_endpoint.items()))
+    }
+
+def print_report(report):
+    print()
+    print(f"Ran {report['elapsed_s']:.0f}s: {report['user_messages']} user messages, "
+          f"{report['bot_posts']} bot posts, {report['games_finished']} games finished")
+    print(f"Sent by kind: {report['messages_sent']}")
+    print()
+    print(f"{'reply latency':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, r in report["reply_latency"].items():
+        print(f"{kind:<14} {r['count']:>6} {r['p50_ms']:>9.0f} {r['p95_ms']:>9.0f} {r['p99_ms']:>9.0f} {r['max_ms']:>9.0f}")
+    print()
+    print(f"Dropped commands (no reply): {sum(report['dropped'].values())} {report['dropped'] or ''}")
+    if report["forged_callbacks_answered"] is not None:
+        print(f"Forged webhook callbacks acted on: {report['forged_callbacks_answered']}")
+    per_message = report["requests_per_message"]
+    print(f"API requests: {report['api_requests']} "
+          f"({per_message:.2f} per user message)" if per_message is not None else f"API requests: {report['api_requests']}")
+    for name, count in report["requests_by_endpoint"].items():
+        print(f"  {name}: {count}")
+
+# ---------------------------------------------------------
+# Main
+# ---------------------------------------------------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_bot(base_url, webhook_port=None):
+    # Import the bot from a scratch directory so its leaderboard/trigger files stay out of the way
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    start_dir = os.getcwd()
+    scratch_dir = tempfile.mkdtemp(prefix="clean-memes-sim-")
+    os.chdir(scratch_dir)
+
+    def remove_scratch_dir():
+        # Registered before the bot is imported, so it runs after the bot's own exit handlers
+        os.chdir(start_dir)
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    atexit.register(remove_scratch_dir)
+
+    import Groupme_Bot as bot
+
+    bot.BASE_URL = base_url
+    bot.TOKEN = "sim-token"
+    bot.GROUP_ID = SIM_GROUP_ID
+    bot.GROUP_IDS = [SIM_GROUP_ID]
+    bot.MAIN_GROUP_ID = SIM_MAIN_GROUP_ID
+    if webhook_port is not None:
+        bot.WEBHOOK_ENABLED = True
+        bot.WEBHOOK_HOST = "127.0.0.1"
+        bot.WEBHOOK_PORT = webhook_port
+
+    runtime = bot.watch_for_mentions
+    if bot.USE_ASYNCIO:
+        runtime = lambda: bot.asyncio.run(bot.watch_for_mentions_async())
+
+    threading.Thread(target=runtime, daemon=True).start()
+    return bot
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake GroupMe API and load simulator for the Clean Memes bot")
+    parser.add_argument("--users", type=int, default=20, help="simulated users")
+    parser.add_argument("--games", type=int, default=5, help="Tic Tac Toe games played at the same time")
+    parser.add_argument("--rate", type=float, default=2.0, help="chat messages per second, across all users")
+    parser.add_argument("--think", type=float, default=2.0, help="longest pause before a player's next game step (s)")
+    parser.add_argument("--duration", type=float, default=60.0, help="how long to send messages (s)")
+    parser.add_argument("--grace", type=float, default=15.0, help="extra time to wait for outstanding replies (s)")
+    parser.add_argument("--reply-timeout", type=float, default=30.0, help="a command without a reply after this long is dropped (s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per API request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- added to the latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=0, help="port for the fake API (default: any free port)")
+    parser.add_argument("--no-bot", action="store_true", help="don't start the bot here; point a running bot at the fake API")
+    parser.add_argument("--server-only", action="store_true", help="only run the fake API")
+    parser.add_argument("--webhook", nargs="?", const="", metavar="URL",
+                        help="also POST every message to the bot's webhook (URL needed with --no-bot)")
+    parser.add_argument("--json", help="save the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    fake = FakeGroupMe(args.latency, args.jitter, args.error_rate, args.rate_limit, args.seed)
+    server = start_fake_server(fake, args.port)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v3"
+
+    # The bot needs at least one message to start its cursor from
+    fake.add_message(SIM_GROUP_ID, "system", "GroupMe", "Simulation started", sender_type="system")
+    print(f"Fake GroupMe API at {base_url} (GROUP_ID {SIM_GROUP_ID}, MAIN_GROUP_ID {SIM_MAIN_GROUP_ID})")
+
+    sim = Simulator(fake, SIM_GROUP_ID, args.users, args.games, args.rate, args.think, args.reply_timeout, args.seed)
+
+    if args.server_only:
+        print("Serving until interrupted (Ctrl+C)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return 0
+
+    if args.webhook == "" and args.no_bot:
+        parser.error("--webhook needs the bot's callback URL with --no-bot")
+
+    if not args.no_bot:
+        webhook_port = free_port() if args.webhook == "" else None
+        bot = start_bot(base_url, webhook_port)
+        if webhook_port is not None:
+            args.webhook = f"http://127.0.0.1:{webhook_port}{bot.WEBHOOK_PATH}"
+    time.sleep(1)
+
+    fake.callback_url = args.webhook
+    sim.setup_triggers()
+    if args.webhook is not None:
+        sim.forge_callback()
+    with fake.lock:
+        requests_before = Counter(fake.requests)
+
+    elapsed = sim.run(args.duration, args.grace)
+    report = build_report(sim, fake, elapsed, requests_before, args)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())